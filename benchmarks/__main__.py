@@ -0,0 +1,293 @@
+"""Offline benchmark suite.
+
+    python -m benchmarks                   # compare against baseline.json
+    python -m benchmarks --save            # record a new baseline
+    python -m benchmarks -k sharer -t 1.5  # filter, custom threshold
+
+Each benchmark reports the best per-call time over several rounds, with
+garbage collection off as in ``timeit``. Times are compared in units of a
+fixed reference workload timed right before each benchmark, so drifting
+machine load cancels out and a baseline recorded on other hardware still
+roughly applies. A benchmark regresses when its relative time is over
+``threshold`` times the baseline's. Benchmarks whose baseline is under
+``--min-time`` are reported but not gated: at that scale the noise of a
+shared machine exceeds any threshold worth setting. Re-record baselines
+with ``--save`` when changing hardware for tighter comparisons.
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import pathlib
+import statistics
+import sys
+import time
+import typing
+
+from tibia_stats import (
+    analytics,
+    api,
+    cache,
+    client,
+    objects,
+    parsing,
+    party,
+    roster,
+    scheduler,
+)
+
+from . import fixtures
+
+BASELINE = pathlib.Path(__file__).parent / "baseline.json"
+# Baseline entry holding the reference workload's time.
+REFERENCE = "reference"
+SIZES = {"small": 40, "large": 1500, "huge": 20_000}
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+        self.status_code = 200
+
+
+class _StubClient:
+    def __init__(self, text: str):
+        self.response = _Response(text)
+
+    def get(self, url: str, **kw) -> _Response:
+        return self.response
+
+
+def _fetching(page: str, fn: typing.Callable[[], typing.Any]):
+    stub = _StubClient(page)
+
+    def run():
+        client.set_client(stub)
+        return fn()
+
+    return run
+
+
+def _revalidating(fn: typing.Callable[[], typing.Any]):
+    def run():
+        api.revalidate = True
+        try:
+            return fn()
+        finally:
+            api.revalidate = False
+
+    return run
+
+
+def _world_page(size: str) -> str:
+    if size == "small":
+        return fixtures.load("world.html")
+    if size == "large":
+        return fixtures.load("online_large.html")
+    return fixtures.world_page(SIZES[size], seed=2)
+
+
+def _roster(size: str) -> roster.OnlineRoster:
+    return roster.OnlineRoster.from_rows(parsing.online_rows(_world_page(size)))
+
+
+def _character(world: str = "Antica") -> objects.Character:
+    char = objects.Character.from_character_page(fixtures.load("character.html"))
+    char.world = objects.World.from_world_page(fixtures.load("world.html"), name=world)
+    return char
+
+
+def _server_rosters(worlds: int = 90, players: int = 50_000) -> dict:
+    rosters = {}
+    for i in range(worlds):
+        chars = parsing.online_rows(fixtures.online_table(players // worlds, seed=i))
+        rosters[f"World{i}"] = roster.OnlineRoster.from_rows(chars)
+    return rosters
+
+
+def _overview(rosters: dict) -> None:
+    overview = analytics.Overview(rosters)
+    overview.level_distribution()
+    overview.level_distribution(by="vocation")
+    overview.vocation_mix()
+    overview.sharer_density()
+    overview.stats()
+
+
+def benchmarks() -> typing.Iterator[tuple[str, typing.Callable[[], typing.Any]]]:
+    worlds_page = fixtures.load("worlds.html")
+    world_page = fixtures.load("world.html")
+    character_page = fixtures.load("character.html")
+
+    yield "World.from_world_page", lambda: objects.World.from_world_page(
+        world_page, name="Antica"
+    )
+
+    import bs4
+
+    soup = bs4.BeautifulSoup(worlds_page, "html.parser")
+    rows = soup.find("table", class_="Table3").find_all("table", class_="TableContent")
+    rows = rows[2].find_all("tr")[1:]
+    yield "World.from_row", lambda: [objects.World.from_row(r) for r in rows]
+
+    yield "list_worlds", _fetching(worlds_page, lambda: list(api.list_worlds()))
+
+    yield "Character.from_character_page", lambda: objects.Character.from_character_page(
+        character_page
+    )
+
+    rosters = _server_rosters()
+    yield "analytics_overview[50k]", lambda: _overview(rosters)
+
+    char = _character()
+    app = importlib.import_module("tibia_stats.app")
+    for size in SIZES:
+        yield f"get_online_characters[{size}]", _fetching(
+            _world_page(size), lambda: api.get_online_characters("Antica")
+        )
+        yield f"get_online_characters_unchanged[{size}]", _fetching(
+            _world_page(size),
+            _revalidating(lambda: api.get_online_characters("Antica")),
+        )
+
+        online = _roster(size)
+        chars = list(online)
+        yield f"roster_characters[{size}]", lambda online=online: list(online)
+        yield f"top_sharer[{size}]", lambda online=online: roster.OnlineRoster(
+            online.names, online.levels, online.vocations
+        ).sharers.top()
+        yield f"top_sharer_characters[{size}]", lambda chars=chars: api.top_sharer(
+            chars
+        )
+        yield f"top_percentage[{size}]", lambda chars=chars: api.top_percentage(
+            chars, char.level
+        )
+        yield f"party_windows[{size}]", lambda online=online: party.PartyFinder(
+            online
+        ).windows()
+        yield f"level_graph[{size}]", lambda online=online: app.level_graph(
+            char, online, True, "50"
+        )
+
+
+def check_parsers() -> list[str]:
+    """Names of fixtures whose parse differs between parsing backends."""
+    pages = {
+        "world.html": [parsing.world_info_rows, parsing.online_rows],
+        "online_large.html": [parsing.online_rows],
+        "character.html": [parsing.character_info_rows],
+        "worlds.html": [parsing.world_list_rows],
+    }
+    mismatches = []
+    previous = parsing.get_backend()
+    try:
+        for name, parsers in pages.items():
+            markup = fixtures.load(name)
+            results = []
+            for backend in parsing.BACKENDS:
+                parsing.set_backend(backend)
+                results.append([parse(markup) for parse in parsers])
+            if any(result != results[0] for result in results[1:]):
+                mismatches.append(name)
+    finally:
+        parsing.set_backend(previous)
+    return mismatches
+
+
+def reference() -> None:
+    """Fixed mix of interpreter and C-level work that calibrates a run."""
+    values = list(range(20_000, 0, -1))
+    sorted(values)
+    json.dumps(values)
+    sum(value * value for value in values)
+
+
+def measure(fn: typing.Callable[[], typing.Any], rounds: int = 9) -> float:
+    """Best seconds per call, with enough calls per round to last ~0.1 s."""
+    start = time.perf_counter()
+    fn()
+    once = time.perf_counter() - start
+    number = max(1, int(0.1 / once)) if once else 1000
+    timings = []
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            timings.append((time.perf_counter() - start) / number)
+    finally:
+        if enabled:
+            gc.enable()
+    return min(timings)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="Substring of names.")
+    parser.add_argument("-t", "--threshold", type=float, default=1.5)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=1.0,
+        help="Only gate benchmarks whose baseline takes at least this many ms.",
+    )
+    parser.add_argument("--save", action="store_true", help="Record a baseline.")
+    args = parser.parse_args(argv)
+
+    if mismatches := check_parsers():
+        print(f"parsing backends disagree on: {', '.join(mismatches)}")
+        return 1
+
+    for resource in api.caches:
+        api.caches[resource] = cache.NoCache()
+    api.revalidate = False
+    # Requests never leave the process, so there is nothing to throttle.
+    scheduler.set_scheduler(scheduler.Scheduler(rate=1e9, burst=1_000_000))
+    previous_client = client.get_client()
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    # Relative times only compare against a baseline with a reference.
+    base_reference = baseline.get(REFERENCE)
+    results, references = {}, []
+    ratios, regressions = {}, []
+    try:
+        for name, fn in benchmarks():
+            if args.filter not in name:
+                continue
+            references.append(unit := measure(reference, rounds=3))
+            results[name] = elapsed = measure(fn)
+            line = f"{name:<40}{elapsed * 1000:>12.3f} ms"
+            if (base := baseline.get(name)) is not None and base_reference:
+                ratios[name] = ratio = (elapsed / unit) / (base / base_reference)
+                line += f"{ratio:>8.2f}x"
+                if base * 1000 < args.min_time:
+                    line += "  (not gated)"
+                elif ratio > args.threshold:
+                    regressions.append(name)
+                    line += "  REGRESSION"
+            print(line)
+    finally:
+        client.set_client(previous_client)
+    if references:
+        results[REFERENCE] = statistics.median(references)
+        print(f"{REFERENCE:<40}{results[REFERENCE] * 1000:>12.3f} ms")
+
+    if args.save:
+        BASELINE.write_text(json.dumps({**baseline, **results}, indent=2) + "\n")
+        print(f"saved {len(results)} baselines to {BASELINE}")
+        return 0
+
+    if regressions:
+        print(
+            f"{len(regressions)} regression(s) over {args.threshold}x, "
+            f"median {statistics.median(ratios[name] for name in regressions):.2f}x"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""HTML fixtures for the benchmark suite.
+
+The saved pages under ``fixtures/`` mirror the table layout of the
+tibia.com worlds list, world, online list and character pages that
+:mod:`tibia_stats.parsing` navigates. They come from the synthetic page
+generators in :mod:`tibia_stats.replay`; huge worlds are generated on
+demand with :func:`world_page`.
+
+    python -m benchmarks.fixtures   # regenerate the saved pages
+"""
+
+import pathlib
+
+from tibia_stats.replay import character_page, online_table, world_page, worlds_page
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+PAGES = {
+    "worlds.html": lambda: worlds_page(90),
+    "world.html": lambda: world_page(40),
+    "online_large.html": lambda: world_page(1500, seed=1),
+    "character.html": character_page,
+}
+
+
+def load(name: str) -> str:
+    return (FIXTURES / name).read_text()
+
+
+if __name__ == "__main__":
+    FIXTURES.mkdir(exist_ok=True)
+    for name, build in PAGES.items():
+        (FIXTURES / name).write_text(build())
+        print(f"wrote {FIXTURES / name}")
@@ -0,0 +1,57 @@
+"""Import-time budget for the modules used outside the dashboard.
+
+Each module is imported in a fresh interpreter with ``-X importtime``. The
+check fails when the cumulative import time exceeds its budget or when a
+UI/analytics dependency gets loaded.
+
+    python -m benchmarks.import_time
+"""
+
+import subprocess
+import sys
+
+# Cumulative import time budgets in milliseconds.
+BUDGETS = {
+    "tibia_stats": 25,
+    "tibia_stats.api": 750,
+    "tibia_stats.crawler": 800,
+    "tibia_stats.cli": 250,
+}
+
+FORBIDDEN = ("dash", "dash_mantine_components", "pandas", "plotly")
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    code = (
+        f"import sys, {module}; "
+        f"print(*[m for m in {FORBIDDEN!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self, cumulative, name = line.removeprefix("import time:").split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1000, result.stdout.split()
+    raise RuntimeError(f"{module} was not imported")
+
+
+def main() -> int:
+    failed = False
+    for module, budget in BUDGETS.items():
+        elapsed, loaded = measure(module)
+        ok = elapsed <= budget and not loaded
+        failed |= not ok
+        status = "ok" if ok else "FAIL"
+        extra = f"  loaded {', '.join(loaded)}" if loaded else ""
+        print(f"{status:<5}{module:<24}{elapsed:>8.1f} ms / {budget} ms{extra}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
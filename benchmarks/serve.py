@@ -0,0 +1,165 @@
+"""Requests per second of the dev server against ``tibia-stats serve``.
+
+    python -m benchmarks.serve
+    python -m benchmarks.serve --concurrency 32 --duration 10 --workers 4
+
+Both servers are started in a subprocess and hit with the page layout and
+the level graph callback, which render from fixtures. The servers answer
+any tibia.com lookup from synthetic pages (``TIBIA_STATS_REPLAY``, see
+:mod:`tibia_stats.replay`) unless the variable is already set.
+
+Both servers keep their lookup caches and request budget on disk (see
+``--cache-dir``). The dev server did not before, so "dev" is not the
+original in-memory baseline: the difference measured is gunicorn's workers
+and threads against the Flask debug server, both on shared caches.
+"""
+
+import argparse
+import concurrent.futures
+import importlib
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+from tibia_stats import objects, parsing, roster
+
+from . import fixtures
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _graph_request(players: int) -> dict:
+    app = importlib.import_module("tibia_stats.app")
+    char = objects.Character.from_character_page(fixtures.load("character.html"))
+    char.world = objects.World.from_world_page(
+        fixtures.load("world.html"), name="Antica"
+    )
+    online = roster.OnlineRoster.from_rows(
+        parsing.online_rows(fixtures.world_page(players, seed=3))
+    )
+    return {
+        "output": "..char-graph.children...live-seq.data...live-status.children..",
+        "outputs": [
+            {"id": "char-graph", "property": "children"},
+            {"id": "live-seq", "property": "data"},
+            {"id": "live-status", "property": "children"},
+        ],
+        "inputs": [
+            {
+                "id": "char-data",
+                "property": "data",
+                "value": app.dump_details(char, online),
+            },
+            {"id": "show-vocation", "property": "checked", "value": True},
+            {"id": "lvl-group", "property": "value", "value": "50"},
+        ],
+        "changedPropIds": ["lvl-group.value"],
+    }
+
+
+def _start(command: list[str], port: int) -> subprocess.Popen:
+    env = {
+        "TIBIA_STATS_REPLAY": "synthetic",
+        **os.environ,
+        "PORT": str(port),
+        "HOST": "127.0.0.1",
+    }
+    process = subprocess.Popen(
+        command,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/_dash-layout", timeout=5)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    _stop(process)
+    raise RuntimeError(f"server did not start: {' '.join(command)}")
+
+
+def _stop(process: subprocess.Popen) -> None:
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait()
+
+
+def load(port: int, body: dict, concurrency: int, duration: float) -> dict:
+    """Hammer the server; alternate layout and graph requests."""
+    base = f"http://127.0.0.1:{port}"
+
+    def client(deadline: float) -> list[float]:
+        latencies = []
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                if len(latencies) % 2:
+                    response = session.post(f"{base}/_dash-update-component", json=body)
+                else:
+                    response = session.get(f"{base}/_dash-layout")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+    deadline = time.monotonic() + duration
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(client, [deadline] * concurrency))
+    latencies = sorted(t for result in results for t in result)
+    return {
+        "rps": len(latencies) / duration,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serve")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-d", "--duration", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--players", type=int, default=1500)
+    args = parser.parse_args(argv)
+
+    body = _graph_request(args.players)
+    servers = {
+        "dev": [sys.executable, "-m", "tibia_stats"],
+        "serve": [
+            sys.executable,
+            "-c",
+            "from tibia_stats.cli import main; main()",
+            "serve",
+            f"--workers={args.workers}",
+            f"--threads={args.threads}",
+        ],
+    }
+    for name, command in servers.items():
+        port = _free_port()
+        process = _start(command, port)
+        try:
+            load(port, body, 2, 1.0)  # warm up
+            result = load(port, body, args.concurrency, args.duration)
+        finally:
+            _stop(process)
+        print(
+            f"{name:<8}{result['rps']:>10.1f} req/s"
+            f"{result['p50']:>10.1f} ms p50{result['p95']:>10.1f} ms p95"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,8 +7,9 @@ setup(
     author="Frederico Jordan",
     author_email="fredericojordan@gmail.com",
     description="Stats for Tibia",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     install_requires=["numpy >= 1.11.1", "matplotlib >= 1.5.1"],
+    extras_require={"export": ["pyarrow"]},
     entry_points={
         "console_scripts": ["tibia-stats=tibia_stats.cli:main"],
     },
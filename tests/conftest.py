@@ -0,0 +1,12 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """``tibia_stats.app``, with its job store in a temporary directory."""
+    mp = pytest.MonkeyPatch()
+    mp.setenv("TIBIA_STATS_JOBS", str(tmp_path_factory.mktemp("jobs")))
+    yield importlib.import_module("tibia_stats.app")
+    mp.undo()
@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+
+from tibia_stats import analytics, roster
+
+
+def _roster(seed: int, size: int) -> roster.OnlineRoster:
+    rnd = random.Random(seed)
+    return roster.OnlineRoster(
+        [f"Player {i}" for i in range(size)],
+        # Low levels use separate formulas for every stat.
+        [rnd.choice([rnd.randint(1, 12), rnd.randint(1, 900)]) for _ in range(size)],
+        [rnd.randrange(len(roster.VOCATIONS)) for _ in range(size)],
+    )
+
+
+ROSTERS = {"World1": _roster(0, 300), "World2": _roster(1, 40), "World3": _roster(2, 0)}
+
+
+def test_sharer_density_matches_sharer_index():
+    levels, density = analytics.Overview(ROSTERS).sharer_density()
+    for row, chars in zip(density, ROSTERS.values()):
+        assert row.tolist() == [chars.sharers.count(level) for level in levels]
+
+
+def test_stats_match_character_properties():
+    stats = analytics.Overview(ROSTERS).stats()
+    for i, chars in enumerate(ROSTERS.values()):
+        for stat in ("life", "mana", "cap"):
+            assert stats[stat][i] == sum(getattr(c, stat) for c in chars)
+
+
+def test_vocation_stats_match_every_vocation_and_low_level():
+    levels = np.repeat(np.arange(1, 21), len(roster.VOCATIONS))
+    codes = np.tile(np.arange(len(roster.VOCATIONS)), 20)
+    stats = analytics.vocation_stats(levels, codes)
+    chars = roster.OnlineRoster([""] * len(levels), levels, codes)
+    for stat in ("life", "mana", "cap"):
+        assert stats[stat].tolist() == [getattr(c, stat) for c in chars]
+
+
+def test_empty_overview():
+    overview = analytics.Overview({})
+    assert len(overview) == 0
+    assert overview.online().tolist() == []
+    assert overview.stats()["life"].tolist() == []
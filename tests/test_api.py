@@ -0,0 +1,94 @@
+import collections
+import concurrent.futures
+import json
+
+import pytest
+
+from tibia_stats import api, cache, client, errors, replay, scheduler
+
+
+class _Response:
+    status_code = 200
+    headers = {}
+    text = "<html>same page</html>"
+
+
+class _StubClient:
+    def get(self, url, **kw):
+        return _Response()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(api, "revalidation", dict.fromkeys(api.revalidation, 0))
+    monkeypatch.setattr(api, "_parsed", type(api._parsed)())
+    previous_client = client.set_client(_StubClient())
+    previous_scheduler = scheduler.set_scheduler(scheduler.Scheduler(rate=1e9))
+    yield
+    client.set_client(previous_client)
+    scheduler.set_scheduler(previous_scheduler)
+
+
+def test_revalidation_counts_every_poll(stub):
+    def poll(i):
+        return api._fetch_parsed(f"/page{i % 4}", "online", "", lambda text: text)
+
+    with concurrent.futures.ThreadPoolExecutor(16) as pool:
+        list(pool.map(poll, range(2000)))
+    assert sum(api.revalidation.values()) == 2000
+
+
+@pytest.fixture
+def synthetic(monkeypatch, tmp_path):
+    """Synthetic tibia.com; recordings in ``tmp_path`` take precedence."""
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", str(tmp_path))
+    monkeypatch.setenv("TIBIA_STATS_REPLAY_PLAYERS", "20")
+    monkeypatch.setenv("TIBIA_STATS_RETRIES", "0")
+    monkeypatch.setattr(
+        api, "caches", {resource: cache.NoCache() for resource in api.caches}
+    )
+    previous_client = client.set_client(None)
+    previous_scheduler = scheduler.set_scheduler(scheduler.Scheduler(rate=1000))
+    yield tmp_path
+    client.set_client(previous_client)
+    scheduler.set_scheduler(previous_scheduler)
+
+
+def _results(names, **kw):
+    return {result.name: result for result in api.get_characters(names, **kw)}
+
+
+def test_get_characters_deduplicates_names(synthetic):
+    results = _results(["World1 Player 1", "world1 player 1", "World1 Player 2"])
+    assert sorted(results) == ["World1 Player 1", "World1 Player 2"]
+    assert all(result.error is None for result in results.values())
+
+
+def test_get_characters_fetches_each_world_once(synthetic, monkeypatch):
+    fetched = collections.Counter()
+    get_world = api.get_world
+    monkeypatch.setattr(
+        api, "get_world", lambda name: fetched.update([name]) or get_world(name)
+    )
+    names = [f"World{w} Player {i}" for w in (1, 2) for i in range(5)]
+    results = _results(names)
+    assert fetched == {"World1": 1, "World2": 1}
+    worlds = {result.character.world.name for result in results.values()}
+    assert worlds == {"World1", "World2"}
+    # Characters of one world share the world they were given.
+    assert len({id(r.character.world) for r in results.values()}) == 2
+
+
+def test_get_characters_reports_errors_per_name(synthetic):
+    broken = f"{client.BASE_URL}/community/?subtopic=characters&name=World1 Player 3"
+    record = {"url": broken, "status": 500, "body": ""}
+    (synthetic / f"{replay._key(broken)}.json").write_text(json.dumps(record))
+
+    results = _results(["World1 Player 1", "World1 Player 3", "World1 Nobody"])
+    assert results["World1 Player 1"].error is None
+    assert results["World1 Player 1"].character.level > 0
+    assert isinstance(results["World1 Nobody"].error, errors.CharacterNotFound)
+    assert results["World1 Nobody"].character is None
+    error = results["World1 Player 3"].error
+    assert isinstance(error, errors.HTTPStatusError)
+    assert error.status_code == 500
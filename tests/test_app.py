@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from tibia_stats import api, cache, client, scheduler
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", "synthetic")
+    monkeypatch.setenv("TIBIA_STATS_REPLAY_PLAYERS", "20")
+    monkeypatch.setattr(
+        api, "caches", {resource: cache.NoCache() for resource in api.caches}
+    )
+    previous_client = client.set_client(None)
+    previous_scheduler = scheduler.set_scheduler(scheduler.Scheduler(rate=1000))
+    yield
+    client.set_client(previous_client)
+    scheduler.set_scheduler(previous_scheduler)
+
+
+def _poll(app_module, job):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        details, data, loading, stop = app_module.populate_details(1, job)
+        if stop is True:
+            return details, data, loading
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_details_job_runs_in_server_process(app_module, replay):
+    assert app_module.app._background_manager is None
+    job, poll_disabled, loading = app_module.start_details(1, "World1 Player 3")
+    assert poll_disabled is False and loading is True
+
+    details, data, loading = _poll(app_module, job)
+    assert data["name"] == "World1 Player 3"
+    assert data["world"]["name"] == "World1"
+    assert loading is False
+    # The result is handed out once.
+    assert app_module.get_jobs().get(("job", job["id"])) is None
+
+
+def test_failed_details_job_shows_error(app_module, replay, monkeypatch):
+    def fail(name):
+        raise RuntimeError("tibia.com is down")
+
+    monkeypatch.setattr(app_module, "fetch_details", fail)
+    job, _, _ = app_module.start_details(1, "Nobody")
+    details, data, _ = _poll(app_module, job)
+    assert data is None
+    assert "Nobody" in str(details)
+
+
+def test_import_creates_no_job_store(tmp_path):
+    jobs = tmp_path / "jobs"
+    env = {**os.environ, "TIBIA_STATS_JOBS": str(jobs)}
+    subprocess.run(
+        [sys.executable, "-c", "import tibia_stats.app"], env=env, check=True
+    )
+    assert not jobs.exists()
@@ -0,0 +1,118 @@
+import concurrent.futures
+import os
+import threading
+import time
+
+import pytest
+
+from tibia_stats import cache
+
+
+class SlowFetch:
+    """Counts calls and blocks each one until :attr:`release` is set."""
+
+    def __init__(self, value="fetched"):
+        self.value = value
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        return self.value
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_share_one_fetch():
+    ttl = cache.TTLCache(ttl=60)
+    fetch = SlowFetch()
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(ttl.get_or_fetch, "World1", fetch) for _ in range(8)]
+        _wait_for(lambda: ttl.misses + ttl.coalesced == 8)
+        fetch.release.set()
+        assert [f.result() for f in futures] == ["fetched"] * 8
+    assert fetch.calls == 1
+    assert (ttl.misses, ttl.coalesced) == (1, 7)
+
+
+def test_least_recently_used_entry_is_evicted_at_maxsize():
+    ttl = cache.TTLCache(ttl=60, maxsize=2)
+    ttl.set("a", 1)
+    ttl.set("b", 2)
+    assert ttl.get_or_fetch("a", lambda: "refetched") == 1
+    ttl.set("c", 3)
+    assert len(ttl) == 2
+    assert ttl.get_or_fetch("b", lambda: "refetched") == "refetched"
+    assert ttl.get_or_fetch("c", lambda: "refetched") == 3
+
+
+def test_entries_expire_after_ttl():
+    ttl = cache.TTLCache(ttl=0.05)
+    ttl.set("World1", "old")
+    assert ttl.get_or_fetch("World1", lambda: "new") == "old"
+    time.sleep(0.06)
+    assert ttl.get_or_fetch("World1", lambda: "new") == "new"
+    assert (ttl.hits, ttl.misses, ttl.stale_hits) == (1, 1, 0)
+
+
+def test_stale_hits_start_one_background_refresh():
+    ttl = cache.TTLCache(ttl=0.05, stale=60)
+    ttl.set("World1", "old")
+    time.sleep(0.06)
+    fetch = SlowFetch("new")
+    assert [ttl.get_or_fetch("World1", fetch) for _ in range(5)] == ["old"] * 5
+    assert ttl.stale_hits == 5
+    fetch.release.set()
+    # Stale hits keep serving the old value until the refresh lands.
+    _wait_for(lambda: ttl.get_or_fetch("World1", fetch) == "new")
+    assert fetch.calls == 1
+
+
+def test_private_directory_is_created_private(tmp_path):
+    path = cache.private_directory("jobs", tmp_path / "jobs")
+    assert os.stat(path).st_mode & 0o777 == 0o700
+
+
+def test_private_directory_refuses_shared_directory(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        cache.private_directory("jobs", shared)
+
+
+def test_private_directory_defaults_to_user_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    path = cache.private_directory("jobs")
+    assert path.startswith(str(tmp_path))
+    assert os.path.isdir(path)
+
+
+def test_unlock_keeps_a_lock_taken_over_by_another_process(tmp_path):
+    shared = cache.SharedCache(tmp_path, "online", ttl=60, lock_timeout=0.1)
+    token = shared._lock("World1")
+    time.sleep(0.2)
+    # The lock expired; another process takes it.
+    other = cache.SharedCache(tmp_path, "online", ttl=60, lock_timeout=30)
+    assert other._lock("World1") is not None
+    shared._unlock("World1", token)
+    assert shared._lock("World1") is None
+
+
+def test_waiter_takes_the_lock_after_timeout(tmp_path):
+    shared = cache.SharedCache(tmp_path, "online", ttl=60, lock_timeout=0.2)
+    assert shared._lock("World1") is not None
+    held = []
+    value = shared._load(
+        "World1", lambda: held.append(shared._lock("World1")) or "fetched"
+    )
+    assert value == "fetched"
+    # The waiter held the lock while fetching and released it afterwards.
+    assert held == [None]
+    assert shared._lock("World1") is not None
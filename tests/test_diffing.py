@@ -0,0 +1,54 @@
+from tibia_stats import diffing, roster
+
+Kind = diffing.EventKind
+
+
+def _roster(**levels):
+    names = list(levels)
+    return roster.OnlineRoster(names, [levels[n] for n in names], [0] * len(names))
+
+
+BEFORE = _roster(stays=100, levels_up=50, dies=200, leaves=30)
+AFTER = _roster(joins=10, stays=100, levels_up=52, dies=180)
+EXPECTED = {
+    diffing.RosterEvent(Kind.LOGIN, "World1", "joins", 10),
+    diffing.RosterEvent(Kind.LEVEL_UP, "World1", "levels_up", 52, 50),
+    diffing.RosterEvent(Kind.DEATH_SUSPECT, "World1", "dies", 180, 200),
+    diffing.RosterEvent(Kind.LOGOUT, "World1", "leaves", 30, 30),
+}
+
+
+def test_diff_rosters():
+    events = list(diffing.diff_rosters(BEFORE, AFTER, "World1"))
+    assert len(events) == len(EXPECTED)
+    assert set(events) == EXPECTED
+
+
+def test_unchanged_roster_has_no_events():
+    assert list(diffing.diff_rosters(BEFORE, BEFORE)) == []
+
+
+def test_differ_notifies_subscribers_per_world():
+    differ = diffing.RosterDiffer()
+    received = []
+    differ.subscribe(lambda world, events: received.append((world, set(events))))
+
+    assert differ.feed("World1", BEFORE) == []
+    assert differ.feed("World2", AFTER) == []
+    assert set(differ.feed("World1", AFTER)) == EXPECTED
+    # Nothing changed on World1 since; subscribers are not called.
+    assert differ.feed("World1", AFTER) == []
+    assert received == [("World1", EXPECTED)]
+
+
+def test_unsubscribe_is_idempotent():
+    differ = diffing.RosterDiffer()
+    received = []
+    unsubscribe = differ.subscribe(lambda world, events: received.append(world))
+    differ.subscribe(lambda world, events: received.append(world.upper()))
+    unsubscribe()
+    unsubscribe()
+
+    differ.feed("World1", BEFORE)
+    differ.feed("World1", AFTER)
+    assert received == ["WORLD1"]
@@ -0,0 +1,13 @@
+import pytest
+
+from benchmarks import import_time
+
+
+@pytest.mark.parametrize("module", import_time.BUDGETS)
+def test_import_within_budget(module):
+    # Best of three fresh interpreters, so one slow start does not fail it.
+    runs = [import_time.measure(module) for _ in range(3)]
+    elapsed = min(elapsed for elapsed, _ in runs)
+    loaded = sorted({name for _, names in runs for name in names})
+    assert not loaded, f"{module} imports {', '.join(loaded)}"
+    assert elapsed <= import_time.BUDGETS[module]
@@ -0,0 +1,44 @@
+import diskcache
+import pytest
+
+from tibia_stats import api, cache, client, live, scheduler
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", "synthetic")
+    monkeypatch.setenv("TIBIA_STATS_REPLAY_PLAYERS", "20")
+    monkeypatch.setattr(
+        api, "caches", {resource: cache.NoCache() for resource in api.caches}
+    )
+    previous_client = client.set_client(None)
+    previous_scheduler = scheduler.set_scheduler(scheduler.Scheduler(rate=1000))
+    yield
+    client.set_client(previous_client)
+    scheduler.set_scheduler(previous_scheduler)
+
+
+def test_rank_index_is_built_once_per_frame(replay, tmp_path):
+    broadcaster = live.Broadcaster(diskcache.Cache(tmp_path), interval=0.01)
+    assert broadcaster.latest("World1") is None
+    first = broadcaster.poll("World1")
+
+    frame, rank = broadcaster.latest("World1")
+    assert frame.seq == first.seq
+    assert broadcaster.latest("World1")[1] is rank
+    assert rank.percentile(int(frame.levels[-1])) == pytest.approx(1 / frame.online)
+
+    broadcaster.store.delete(("live", "poll", "world1"))
+    second = broadcaster.poll("World1")
+    frame, new_rank = broadcaster.latest("World1")
+    assert frame.seq == second.seq == first.seq + 1
+    assert new_rank is not rank
+
+
+def test_rendering_the_graph_starts_polling(app_module, replay, monkeypatch):
+    watched = []
+    monkeypatch.setattr(app_module.get_broadcaster(), "watch", watched.append)
+    data = app_module.dump_details(*app_module.fetch_details("World1 Player 3"))
+    children, seq, status = app_module.render_graph(data, True, "50")
+    assert watched == ["World1"]
+    assert children
@@ -0,0 +1,52 @@
+import pytest
+
+from benchmarks import fixtures
+from tibia_stats import metrics, objects, parsing, roster
+
+
+@pytest.fixture(scope="module")
+def server(app_module):
+    return app_module.app.server.test_client()
+
+
+def _request_routes() -> set[str]:
+    return {
+        labels[1]
+        for labels in metrics.stage_seconds.snapshot()
+        if labels[0] == "request"
+    }
+
+
+def test_request_labels_are_routes(server):
+    metrics.stage_seconds.snapshot(reset=True)
+    for i in range(50):
+        server.get(f"/no-such-page-{i}")
+        server.get(f"/_dash-component-suites/missing-{i}.js")
+    routes = _request_routes()
+    assert len(routes) <= 3
+    assert not any("no-such-page" in route or "missing-" in route for route in routes)
+
+
+def test_disabled_metrics_record_nothing(server):
+    metrics.stage_seconds.snapshot(reset=True)
+    metrics.enable(False)
+    try:
+        server.get("/_dash-layout")
+    finally:
+        metrics.enable(True)
+    assert not _request_routes()
+
+
+def test_level_graph_times_figure_and_serialization(app_module):
+    char = objects.Character.from_character_page(fixtures.load("character.html"))
+    char.world = objects.World.from_world_page(
+        fixtures.load("world.html"), name="Antica"
+    )
+    online = roster.OnlineRoster.from_rows(
+        parsing.online_rows(fixtures.load("world.html"))
+    )
+    metrics.stage_seconds.snapshot(reset=True)
+    graph = app_module.level_graph(char, online, True, "50")
+    assert isinstance(graph.figure, dict)
+    stages = {labels[:2] for labels in metrics.stage_seconds.snapshot()}
+    assert {("figure", "level_graph"), ("serialize", "level_graph")} <= stages
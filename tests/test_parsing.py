@@ -0,0 +1,58 @@
+import pytest
+
+from benchmarks import fixtures
+from tibia_stats import objects, parsing, replay
+
+PAGES = {
+    "worlds": fixtures.load("worlds.html"),
+    "world": fixtures.load("world.html"),
+    "online_large": fixtures.load("online_large.html"),
+    "character": fixtures.load("character.html"),
+    "character_not_found": replay.not_found_page("Nobody"),
+    "world_empty": replay.world_page(0),
+    "worlds_empty": replay.worlds_page(0),
+}
+
+PARSERS = [
+    parsing.world_info_rows,
+    parsing.character_info_rows,
+    parsing.online_rows,
+]
+
+
+def _parse(backend, parse, markup):
+    previous = parsing.set_backend(backend)
+    try:
+        return parse(markup)
+    finally:
+        parsing.set_backend(previous)
+
+
+@pytest.mark.parametrize("page", PAGES)
+@pytest.mark.parametrize("parse", PARSERS, ids=lambda parse: parse.__name__)
+def test_backends_agree(page, parse):
+    results = [_parse(backend, parse, PAGES[page]) for backend in parsing.BACKENDS]
+    assert all(result == results[0] for result in results[1:])
+
+
+@pytest.mark.parametrize("page", ["worlds", "worlds_empty"])
+def test_backends_agree_on_world_list(page):
+    results = [
+        _parse(backend, parsing.world_list_rows, PAGES[page])
+        for backend in parsing.BACKENDS
+    ]
+    assert all(result == results[0] for result in results[1:])
+
+
+def test_pages_without_tables_parse_empty():
+    for backend in parsing.BACKENDS:
+        assert _parse(backend, parsing.online_rows, PAGES["world_empty"]) == []
+        assert _parse(backend, parsing.character_info_rows, PAGES["world"]) == []
+        assert _parse(backend, parsing.online_rows, PAGES["character_not_found"]) == []
+
+
+@pytest.mark.parametrize("backend", parsing.BACKENDS)
+def test_world_list_battle_eye_icons(backend):
+    rows = _parse(backend, parsing.world_list_rows, PAGES["worlds"])
+    statuses = {objects.World.parse_battle_eye_icon(src) for _, src in rows}
+    assert statuses == set(objects.BattleEye)
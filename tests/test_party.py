@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from tibia_stats import objects, party, roster, utils
+
+V = objects.Vocation
+GROUPED = {(V.EK, V.K): 2, (V.ED, V.D, V.MS, V.S): 1}
+
+
+def _roster(seed: int, size: int, max_level: int = 400) -> roster.OnlineRoster:
+    rnd = random.Random(seed)
+    return roster.OnlineRoster(
+        [f"Player {i}" for i in range(size)],
+        [rnd.randint(1, max_level) for _ in range(size)],
+        [rnd.randrange(len(roster.VOCATIONS)) for _ in range(size)],
+    )
+
+
+def _groups(requirements):
+    return [
+        {roster.VOCATION_CODES[v.value] for v in ((r,) if isinstance(r, str) else r)}
+        for r in requirements
+    ]
+
+
+def _brute_windows(online, requirements):
+    """Every window, anchored at each candidate level, by definition."""
+    groups = _groups(requirements)
+    needs = list(requirements.values())
+    members = [
+        (int(level), code)
+        for level, code in zip(online.levels, online.vocations)
+        if any(code in group for group in groups)
+    ]
+    windows = []
+    for anchor in sorted({level for level, _ in members}):
+        inside = [
+            (level, code)
+            for level, code in members
+            if anchor <= level <= utils.max_sharer(anchor)
+        ]
+        counts = tuple(
+            sum(1 for _, code in inside if code in group) for group in groups
+        )
+        parties = min(c // n for c, n in zip(counts, needs))
+        top = max(level for level, _ in inside)
+        windows.append((anchor, top, counts, parties, frozenset(inside)))
+    return windows
+
+
+def _ranked(windows):
+    maximal = [
+        w
+        for i, w in enumerate(windows)
+        if not any(w[4] <= other[4] for other in windows[:i])
+    ]
+    viable = [w for w in maximal if w[3] > 0]
+    viable.sort(key=lambda w: (-w[3], -sum(w[2]), w[0]))
+    return [party.PartyWindow(*w[:4]) for w in viable]
+
+
+@pytest.mark.parametrize("requirements", [party.TEAM_HUNT, GROUPED])
+@pytest.mark.parametrize("seed, size", [(0, 10), (1, 60), (2, 300)])
+def test_windows_match_brute_force(requirements, seed, size):
+    online = _roster(seed, size)
+    finder = party.PartyFinder(online, requirements)
+    windows = _brute_windows(online, requirements)
+    assert finder.anchors.tolist() == [w[0] for w in windows]
+    assert finder.tops.tolist() == [w[1] for w in windows]
+    assert [tuple(c) for c in finder.counts.T.tolist()] == [w[2] for w in windows]
+    assert finder.windows(limit=None) == _ranked(windows)
+
+
+@pytest.mark.parametrize("requirements", [party.TEAM_HUNT, GROUPED])
+@pytest.mark.parametrize("seed", [3, 4])
+def test_best_windows_match_brute_force(requirements, seed):
+    online = _roster(seed, 200)
+    finder = party.PartyFinder(online, requirements)
+    windows = _brute_windows(online, requirements)
+    groups = _groups(requirements)
+    rnd = random.Random(seed)
+    levels = [rnd.randint(1, 500) for _ in range(100)]
+    vocations = [rnd.choice(list(V)) for _ in levels]
+
+    for level, vocation, best in zip(
+        levels, vocations, finder.best_windows(levels, vocations)
+    ):
+        needs = list(requirements.values())
+        code = roster.VOCATION_CODES[vocation.value]
+        for slot, group in enumerate(groups):
+            if code in group:
+                needs[slot] -= 1
+        fits = []
+        for anchor, top, counts, _, _ in windows:
+            if utils.min_sharer(level) <= anchor <= level:
+                parties = min(
+                    (c // n for c, n in zip(counts, needs) if n > 0), default=1
+                )
+                fits.append((parties, sum(counts), -anchor, (anchor, top, counts)))
+        expected = None
+        if fits and (winner := max(fits))[0] > 0:
+            expected = party.PartyWindow(*winner[3], winner[0])
+        assert best == expected
+
+
+def test_required_vocation_with_nobody_online():
+    ek = roster.VOCATION_CODES[V.EK.value]
+    online = roster.OnlineRoster(["a", "b"], [100, 120], [ek, ek])
+    finder = party.PartyFinder(online)
+    assert finder.tops.tolist() == [120, 120]
+    assert finder.counts[:, 0].tolist() == [2, 0, 0, 0]
+    assert finder.windows() == []
+    assert finder.best_windows([110], [V.EK]) == [None]
+
+
+def test_empty_roster():
+    finder = party.PartyFinder(roster.OnlineRoster([], [], []))
+    assert finder.windows() == []
+    assert finder.best_windows([100]) == [None]
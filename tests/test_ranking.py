@@ -0,0 +1,52 @@
+import math
+import random
+import types
+
+import pytest
+
+from tibia_stats import api, ranking
+
+
+def _top_percentage(levels, my_level):
+    """The original scan over a roster sorted by level, highest first."""
+    levels = sorted(levels, reverse=True)
+    for i, level in enumerate(levels):
+        if level < my_level:
+            return i / len(levels)
+
+
+ROSTERS = {
+    "random": [random.Random(0).randint(1, 600) for _ in range(300)],
+    "ties": [100, 100, 100, 50, 50, 8],
+    "single": [250],
+}
+
+
+@pytest.mark.parametrize("levels", ROSTERS.values(), ids=ROSTERS)
+def test_percentile_matches_scan_above_the_lowest_level(levels):
+    index = ranking.RankIndex(levels)
+    for level in range(min(levels) + 1, max(levels) + 2):
+        assert index.percentile(level) == pytest.approx(_top_percentage(levels, level))
+
+
+@pytest.mark.parametrize("levels", ROSTERS.values(), ids=ROSTERS)
+def test_lowest_level_is_at_the_bottom(levels):
+    index = ranking.RankIndex(levels)
+    assert _top_percentage(levels, min(levels)) is None
+    assert index.percentile(min(levels)) == 1.0
+    assert index.percentile(1) == 1.0
+
+
+def test_ranks_share_ties():
+    index = ranking.RankIndex(ROSTERS["ties"])
+    assert index.ranks([100, 50, 8, 1000]).tolist() == [1, 4, 6, 1]
+
+
+def test_empty_index_percentile_is_nan():
+    assert math.isnan(ranking.RankIndex([]).percentile(100))
+
+
+def test_top_percentage_ignores_roster_order():
+    chars = [types.SimpleNamespace(level=level) for level in [50, 8, 100, 100]]
+    assert api.top_percentage(chars, 100) == 0.5
+    assert api.top_percentage(chars, 8) == 1.0
@@ -0,0 +1,152 @@
+import concurrent.futures
+import gc
+import json
+import socket
+import sys
+import threading
+import weakref
+
+import pytest
+from click.testing import CliRunner
+
+from tibia_stats import api, cache, cli, client, replay, scheduler
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Fail any attempt to open a network connection."""
+
+    def connect(*args, **kw):
+        raise AssertionError(f"replay mode opened a socket to {args[1:]}")
+
+    monkeypatch.setattr(socket.socket, "connect", connect)
+    monkeypatch.setattr(socket, "create_connection", connect)
+    monkeypatch.setattr(
+        api, "caches", {resource: cache.NoCache() for resource in api.caches}
+    )
+    previous_client = client.set_client(None)
+    previous_scheduler = scheduler.set_scheduler(scheduler.Scheduler(rate=1000))
+    yield
+    client.set_client(previous_client)
+    scheduler.set_scheduler(previous_scheduler)
+
+
+def test_crawl_replays_without_network(offline, monkeypatch):
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", "synthetic")
+    monkeypatch.setenv("TIBIA_STATS_REPLAY_PLAYERS", "20")
+    result = CliRunner().invoke(cli.main, ["crawl", "World1", "World2"])
+    assert result.exit_code == 0, result.output
+    assert "World1" in result.output and "World2" in result.output
+
+
+def test_export_replays_without_network(offline, monkeypatch, tmp_path):
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", "synthetic")
+    monkeypatch.setenv("TIBIA_STATS_REPLAY_PLAYERS", "20")
+    result = CliRunner().invoke(
+        cli.main, ["export", str(tmp_path), "World1", "--format", "csv"]
+    )
+    assert result.exit_code == 0, result.output
+    lines = (tmp_path / "characters.csv").read_text().splitlines()
+    assert lines[0] == "world,name,level,vocation"
+    assert len(lines) == 21
+
+
+def test_timeout_override_keeps_replay(monkeypatch):
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", "synthetic")
+    http_client = client.default_client(timeout=3)
+    assert http_client.timeout == 3
+    assert type(http_client.session.get_adapter(client.BASE_URL)).__name__ == (
+        "ReplayAdapter"
+    )
+
+
+@pytest.mark.parametrize("command", ["crawl", "export"])
+def test_world_list_failure_is_reported(offline, monkeypatch, tmp_path, command):
+    # Every replayed request answers 503, so the real list_worlds fails.
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", "synthetic")
+    monkeypatch.setenv("TIBIA_STATS_REPLAY_ERRORS", "1")
+    monkeypatch.setenv("TIBIA_STATS_RETRIES", "0")
+    args = [command, str(tmp_path)] if command == "export" else [command]
+    result = CliRunner().invoke(cli.main, args)
+    assert result.exit_code == 1
+    assert "Could not list worlds" in result.output
+    assert "Traceback" not in result.output
+
+
+def test_export_without_pyarrow_is_reported(offline, monkeypatch, tmp_path):
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", "synthetic")
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    result = CliRunner().invoke(cli.main, ["export", str(tmp_path), "World1"])
+    assert result.exit_code == 1
+    assert "pip install pyarrow" in result.output
+
+
+@pytest.mark.parametrize(
+    "value, etags", [("", False), ("0", False), ("false", False), ("1", True)]
+)
+def test_replay_etags_env(monkeypatch, value, etags):
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", "synthetic")
+    monkeypatch.setenv("TIBIA_STATS_REPLAY_ETAGS", value)
+    http_client = client.default_client()
+    assert http_client.session.get_adapter(client.BASE_URL).etags is etags
+
+
+def test_replay_adapter_is_freed():
+    adapter = replay.ReplayAdapter(players=5)
+    adapter._world_page("World1", 5)
+    ref = weakref.ref(adapter)
+    del adapter
+    gc.collect()
+    assert ref() is None
+
+
+def test_concurrent_get_client_builds_one_configured_client(monkeypatch):
+    monkeypatch.setenv("TIBIA_STATS_REPLAY", "synthetic")
+    previous = client.set_client(None)
+    barrier = threading.Barrier(8)
+
+    def get():
+        barrier.wait()
+        return client.get_client()
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            clients = list(pool.map(lambda _: get(), range(8)))
+    finally:
+        client.set_client(previous)
+    assert all(c is clients[0] for c in clients)
+    adapter = clients[0].session.get_adapter(client.BASE_URL)
+    assert isinstance(adapter, replay.ReplayAdapter)
+
+
+def test_recorder_keeps_full_responses_only(offline, tmp_path):
+    http_client = client.Client(retries=0)
+    replay.replay(http_client, etags=True, players=20)
+    replay.record(http_client, tmp_path)
+    url = f"{client.BASE_URL}/community/?subtopic=worlds&world=World1"
+
+    first = http_client.get(url)
+    again = http_client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    missing = http_client.get(f"{client.BASE_URL}/missing")
+    statuses = [r.status_code for r in (first, again, missing)]
+    assert statuses == [200, 304, 404]
+
+    (path,) = tmp_path.iterdir()
+    assert json.loads(path.read_text())["body"] == first.text
+    # The recording replays the full page.
+    replayed = client.Client(retries=0)
+    replay.replay(replayed, tmp_path, synthetic=False)
+    assert replayed.get(url).text == first.text
+
+
+def test_client_counts_concurrent_requests(offline):
+    http_client = client.Client(retries=0)
+    replay.replay(http_client, error_rate=0.5, players=20, seed=0)
+    url = f"{client.BASE_URL}/community/?subtopic=worlds&world=World1"
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        statuses = list(
+            pool.map(lambda _: http_client.get(url).status_code, range(400))
+        )
+    stats = http_client.stats()
+    assert stats["requests"] == 400
+    assert stats["failures"] == statuses.count(503) > 0
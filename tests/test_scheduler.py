@@ -0,0 +1,145 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+import requests
+
+from tibia_stats import api, cache, client, crawler, scheduler
+
+
+class FlakyClient:
+    """Fails the first ``failures`` requests, then answers 200."""
+
+    def __init__(self, failures, retries=3):
+        self.failures = failures
+        self.retries = retries
+        self.calls = 0
+
+    def get(self, url, **kw):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise requests.ConnectionError("connection refused")
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+
+@pytest.fixture
+def installed(monkeypatch):
+    monkeypatch.setattr(
+        api, "caches", {resource: cache.NoCache() for resource in api.caches}
+    )
+    previous_client = client.set_client(None)
+    previous_scheduler = scheduler.set_scheduler(scheduler.Scheduler(rate=1000))
+    yield
+    client.set_client(previous_client)
+    scheduler.set_scheduler(previous_scheduler)
+
+
+def test_connection_errors_are_retried_through_admission(installed, monkeypatch):
+    flaky = FlakyClient(failures=2)
+    client.set_client(flaky)
+    admission = scheduler.get_scheduler()
+    admitted = []
+    admit = admission.admit
+    monkeypatch.setattr(
+        admission, "admit", lambda world="": admitted.append(world) or admit(world)
+    )
+
+    assert api._fetch("/", "worlds").status_code == 200
+    assert flaky.calls == 3
+    assert len(admitted) == 3
+    assert admission.stats()["throttled"] == 2
+    assert admission.rate < 1000
+
+
+def test_last_connection_error_is_raised(installed):
+    flaky = FlakyClient(failures=10, retries=1)
+    client.set_client(flaky)
+    with pytest.raises(requests.ConnectionError):
+        api._fetch("/", "worlds")
+    assert flaky.calls == 2
+
+
+def test_crawl_rate_is_restored(installed, monkeypatch):
+    monkeypatch.setattr(api, "get_online_characters", lambda world, refresh=False: None)
+    admission = scheduler.get_scheduler()
+    worlds = [type("World", (), {"name": "World1"})()]
+    results = crawler.crawl(worlds, rate=2)
+    next(results)
+    assert admission.rate == 2
+    results.close()
+    assert admission.rate == admission.max_rate == 1000
+
+
+def _admission_order(admission, requests):
+    """Queue ``(priority, world)`` requests in order; return who got in when."""
+    # Hold the dispatcher back until every request is queued.
+    while admission.limiter.try_acquire():
+        pass
+    admission.limiter.drain(0.5)
+    admitted, threads = [], []
+
+    def admit(priority, world):
+        if priority == scheduler.Priority.CRAWL:
+            with scheduler.crawling():
+                admission.admit(world)
+        else:
+            admission.admit(world)
+        admitted.append(world)
+
+    for queued, (priority, world) in enumerate(requests, 1):
+        threads.append(threading.Thread(target=admit, args=(priority, world)))
+        threads[-1].start()
+        while sum(v for k, v in admission.stats().items() if "queued" in k) < queued:
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+    return admitted
+
+
+def test_interactive_requests_are_admitted_first():
+    admission = scheduler.Scheduler(rate=50, burst=1)
+    crawl, interactive = scheduler.Priority.CRAWL, scheduler.Priority.INTERACTIVE
+    order = _admission_order(
+        admission,
+        [(crawl, "World1"), (crawl, "World2"), (interactive, "Lookup")],
+    )
+    assert order[0] == "Lookup"
+
+
+def test_crawl_requests_are_admitted_most_overdue_first():
+    admission = scheduler.Scheduler(rate=50, burst=1)
+    admission.polled("Fresh")
+    admission.polled("Due")
+    admission.set_target("Due", 0)
+    crawl = scheduler.Priority.CRAWL
+    order = _admission_order(
+        admission, [(crawl, "Fresh"), (crawl, "Due"), (crawl, "Never")]
+    )
+    assert order == ["Never", "Due", "Fresh"]
+
+
+def _drain(directory, rate, count, queue):
+    limiter = client.SharedRateLimiter(directory, rate, burst=1)
+    for _ in range(count):
+        limiter.acquire()
+    queue.put(time.time())
+
+
+def test_shared_rate_limiter_spans_processes(tmp_path):
+    client.SharedRateLimiter(tmp_path, 20, burst=1)
+    queue = multiprocessing.Queue()
+    start = time.time()
+    processes = [
+        multiprocessing.Process(target=_drain, args=(tmp_path, 20, 5, queue))
+        for _ in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    finished = max(queue.get() for _ in processes)
+    # 10 requests at 20 per second: one per process bucket would take 0.2 s.
+    assert finished - start >= 0.4
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from tibia_stats import sharing
+
+
+def _count_sharers(levels, level):
+    """The original list-scan count_sharers."""
+    min_lvl = int(level * 2 / 3)
+    max_lvl = int(level * 3 / 2) + 1
+    return sum([levels.count(i) for i in range(min_lvl, max_lvl + 1)])
+
+
+def _top_sharer(levels):
+    """The original top_sharer: the lowest level with the most sharers."""
+    max_sharers = (0, 0)
+    for lvl in range(min(levels), max(levels)):
+        sharers = _count_sharers(levels, lvl)
+        if sharers > max_sharers[1]:
+            max_sharers = (lvl, sharers)
+    return max_sharers
+
+
+ROSTERS = {
+    "random": [random.Random(0).randint(1, 600) for _ in range(300)],
+    # Sharer counts tie between level 10 and the levels just above it.
+    "ties": [10, 14, 100, 140],
+    "gaps": [5, 6, 400, 1000],
+    "single_level": [250] * 4,
+    "single": [8],
+}
+
+
+@pytest.mark.parametrize("levels", ROSTERS.values(), ids=ROSTERS)
+def test_count_matches_list_scan(levels):
+    index = sharing.SharerIndex(levels)
+    queries = range(1, max(levels) * 2)
+    assert [index.count(q) for q in queries] == [
+        _count_sharers(levels, q) for q in queries
+    ]
+    assert index.counts(queries).tolist() == [index.count(q) for q in queries]
+
+
+@pytest.mark.parametrize("levels", ROSTERS.values(), ids=ROSTERS)
+def test_top_matches_list_scan(levels):
+    assert sharing.SharerIndex(levels).top() == _top_sharer(levels)
+
+
+def test_empty_share_ranges():
+    index = sharing.SharerIndex([5, 6, 400, 1000])
+    # Nobody between 20 and 40, nor from 1001 up.
+    assert index.count(30) == 0
+    assert index.counts([30, 2000]).tolist() == [0, 0]
+
+
+def test_empty_roster():
+    index = sharing.SharerIndex([])
+    assert len(index) == 0
+    assert index.count(100) == 0
+    assert index.top() == (0, 0)
+    levels, counts = index.curve()
+    assert len(levels) == len(counts) == 0
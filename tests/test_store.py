@@ -0,0 +1,66 @@
+import datetime
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from tibia_stats import roster, store
+
+START = datetime.datetime(2026, 10, 1, tzinfo=datetime.UTC)
+
+
+def _roster(names, level=100):
+    return roster.OnlineRoster(
+        list(names),
+        np.full(len(names), level, dtype=np.uint16),
+        np.zeros(len(names), dtype=np.uint8),
+    )
+
+
+def _append_many(root, worker, barrier):
+    snapshots = store.SnapshotStore(root)
+    barrier.wait()
+    for i in range(20):
+        names = [f"Shared {i}", f"Worker {worker} {i}"]
+        snapshots.append("Antica", _roster(names))
+
+
+def test_concurrent_appends_keep_name_ids_consistent(tmp_path):
+    barrier = multiprocessing.Barrier(3)
+    processes = [
+        multiprocessing.Process(target=_append_many, args=(tmp_path, w, barrier))
+        for w in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    names = (tmp_path / "Antica" / "names").read_text().splitlines()
+    assert len(names) == len(set(names)) == 20 + 3 * 20
+    snapshots = store.SnapshotStore(tmp_path)
+    for worker in range(3):
+        times, levels = snapshots.character_levels(f"Worker {worker} 19", "Antica")
+        assert len(times) == 1 and levels.tolist() == [100]
+
+
+def test_out_of_order_append_is_rejected(tmp_path):
+    snapshots = store.SnapshotStore(tmp_path)
+    snapshots.append("Antica", _roster(["A"]), START + datetime.timedelta(days=1))
+    with pytest.raises(ValueError):
+        snapshots.append("Antica", _roster(["B"]), START)
+    # A snapshot at the same second is still in order.
+    snapshots.append("Antica", _roster(["C"]), START + datetime.timedelta(days=1))
+    taken_at, chars = snapshots.load("Antica")
+    assert list(chars.names) == ["C"]
+
+
+def test_names_added_by_another_store_are_read(tmp_path):
+    first, second = store.SnapshotStore(tmp_path), store.SnapshotStore(tmp_path)
+    first.append("Antica", _roster(["A", "B"]), START)
+    second.append("Antica", _roster(["B", "C"]), START + datetime.timedelta(hours=1))
+    first.append("Antica", _roster(["C", "D"]), START + datetime.timedelta(hours=2))
+    _, chars = second.load("Antica")
+    assert sorted(chars.names) == ["C", "D"]
+    assert (tmp_path / "Antica" / "names").read_text().split() == ["A", "B", "C", "D"]
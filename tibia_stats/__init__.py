@@ -1,5 +1,118 @@
-from .api import *
-from .app import *
-from .cli import *
-from .objects import *
-from .utils import *
+import importlib
+
+# Public names and the submodule defining them. Submodules are imported on
+# first attribute access so that e.g. ``tibia_stats.api`` does not pull in
+# Dash, pandas and Plotly.
+_exports = {
+    "list_worlds": "api",
+    "get_world": "api",
+    "get_character": "api",
+    "get_characters": "api",
+    "CharacterResult": "api",
+    "get_online_characters": "api",
+    "caches": "api",
+    "share_caches": "api",
+    "count_sharers": "api",
+    "top_sharer": "api",
+    "top_percentage": "api",
+    "Overview": "analytics",
+    "overview": "analytics",
+    "app": "app",
+    "TTLCache": "cache",
+    "SharedCache": "cache",
+    "NoCache": "cache",
+    "main": "cli",
+    "Client": "client",
+    "RateLimiter": "client",
+    "get_client": "client",
+    "set_client": "client",
+    "CrawlResult": "crawler",
+    "crawl": "crawler",
+    "EventKind": "diffing",
+    "RosterEvent": "diffing",
+    "RosterDiffer": "diffing",
+    "diff_rosters": "diffing",
+    "TibiaError": "errors",
+    "HTTPStatusError": "errors",
+    "CharacterNotFound": "errors",
+    "WorldNotFound": "errors",
+    "Histogram": "metrics",
+    "stage_seconds": "metrics",
+    "timed": "metrics",
+    "Pvp": "objects",
+    "Location": "objects",
+    "BattleEye": "objects",
+    "WorldType": "objects",
+    "OnlineStatus": "objects",
+    "World": "objects",
+    "Gender": "objects",
+    "Premium": "objects",
+    "Vocation": "objects",
+    "Character": "objects",
+    "BACKENDS": "parsing",
+    "get_backend": "parsing",
+    "set_backend": "parsing",
+    "world_info_rows": "parsing",
+    "character_info_rows": "parsing",
+    "online_rows": "parsing",
+    "world_list_rows": "parsing",
+    "TEAM_HUNT": "party",
+    "PartyWindow": "party",
+    "PartyFinder": "party",
+    "RankIndex": "ranking",
+    "Recorder": "replay",
+    "ReplayAdapter": "replay",
+    "OnlineRoster": "roster",
+    "Priority": "scheduler",
+    "Scheduler": "scheduler",
+    "crawling": "scheduler",
+    "SharerIndex": "sharing",
+    "SnapshotStore": "store",
+    "decode": "utils",
+    "min_sharer": "utils",
+    "max_sharer": "utils",
+    "parse_tibian_date": "utils",
+}
+
+_submodules = {
+    "analytics",
+    "api",
+    "app",
+    "cache",
+    "cli",
+    "client",
+    "crawler",
+    "diffing",
+    "errors",
+    "export",
+    "live",
+    "metrics",
+    "objects",
+    "parsing",
+    "party",
+    "ranking",
+    "replay",
+    "roster",
+    "scheduler",
+    "sharing",
+    "store",
+    "utils",
+}
+
+__all__ = tuple(_exports)
+
+
+def __getattr__(name: str):
+    if name in _exports:
+        module = importlib.import_module(f".{_exports[name]}", __name__)
+        value = getattr(module, name)
+    elif name in _submodules:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_exports, *_submodules})
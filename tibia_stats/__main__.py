@@ -1,7 +1,17 @@
 import os
 
 
+def _share_caches():
+    from . import api, cache, scheduler
+
+    directory = cache.private_directory("shared", os.getenv("TIBIA_STATS_CACHE"))
+    api.share_caches(directory)
+    # One request budget for all workers, rather than one per worker.
+    scheduler.share(os.path.join(directory, "scheduler"))
+
+
 def run():
+    _share_caches()
     from .app import app
 
     host = os.getenv("HOST") or "0.0.0.0"
@@ -9,5 +19,35 @@ def run():
     app.run(host=host, port=port, debug=True, dev_tools_hot_reload=True)
 
 
+def serve(
+    host: str = "0.0.0.0",
+    port: int = 10_000,
+    workers: int = 2,
+    threads: int = 4,
+    timeout: int = 120,
+):
+    """Serve the app with gunicorn: preloaded, multi-worker, debug off."""
+    from gunicorn.app.base import BaseApplication
+
+    # Before the app is loaded, so every forked worker and background job
+    # reads and fills the same cache directory.
+    _share_caches()
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("timeout", timeout)
+            self.cfg.set("preload_app", True)
+
+        def load(self):
+            from .app import app
+
+            return app.server
+
+    Application().run()
+
+
 if __name__ == "__main__":
     run()
@@ -0,0 +1,207 @@
+__all__ = ("Overview", "overview", "vocation_stats")
+
+import functools
+import threading
+import typing
+
+import numpy as np
+
+from . import objects, roster, utils
+
+
+@functools.cache
+def _stat_tables() -> dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Per-stat ``(low, base, delta)`` lookup tables from the Character formulas.
+
+    ``low[level]`` holds the value below level 9, and ``base[code]`` and
+    ``delta[code]`` hold the linear formula per vocation code from level 9 up.
+    """
+    chars = {
+        level: objects.Character.from_columns(
+            [""] * len(roster.VOCATIONS),
+            [level] * len(roster.VOCATIONS),
+            roster.VOCATIONS,
+        )
+        for level in range(11)
+    }
+    tables = {}
+    for stat in ("life", "mana", "cap"):
+        low = np.array([getattr(chars[level][0], stat) for level in range(9)])
+        at_9 = np.array([getattr(c, stat) for c in chars[9]])
+        delta = np.array([getattr(c, stat) for c in chars[10]]) - at_9
+        tables[stat] = (low, at_9 - 9 * delta, delta)
+    return tables
+
+
+def vocation_stats(levels: np.ndarray, vocations: np.ndarray) -> dict[str, np.ndarray]:
+    """Life, mana and cap of every ``(level, vocation code)`` pair."""
+    levels = np.asarray(levels, dtype=np.int64)
+    vocations = np.asarray(vocations, dtype=np.intp)
+    low_levels = levels < 9
+    clipped = np.minimum(levels, 8)
+    result = {}
+    for stat, (low, base, delta) in _stat_tables().items():
+        values = base[vocations] + delta[vocations] * levels
+        result[stat] = np.where(low_levels, low[clipped], values)
+    return result
+
+
+class Overview:
+    """Server-wide aggregates over the online rosters of many worlds.
+
+    All rosters are concatenated into flat level, vocation and world-code
+    columns once; every aggregate is then a handful of NumPy passes over
+    them. Aggregates are computed on first use and kept for the lifetime of
+    the overview, i.e. one snapshot of the rosters.
+    """
+
+    def __init__(self, rosters: typing.Mapping[str, roster.OnlineRoster]):
+        self.worlds = tuple(rosters)
+        sizes = [len(r) for r in rosters.values()]
+        self.levels = np.concatenate(
+            [r.levels for r in rosters.values()] or [np.empty(0, np.int32)]
+        ).astype(np.int64)
+        self.vocations = np.concatenate(
+            [r.vocations for r in rosters.values()] or [np.empty(0, np.uint8)]
+        )
+        self.world_codes = np.repeat(np.arange(len(sizes), dtype=np.int64), sizes)
+        self._lock = threading.Lock()
+        self._results: dict[tuple, typing.Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def _cached(self, key: tuple, compute: typing.Callable[[], typing.Any]):
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+        value = compute()
+        with self._lock:
+            return self._results.setdefault(key, value)
+
+    @property
+    def max_level(self) -> int:
+        return int(self.levels.max()) if len(self) else 0
+
+    def online(self) -> np.ndarray:
+        """Characters online per world."""
+        return self._cached(
+            ("online",),
+            lambda: np.bincount(self.world_codes, minlength=len(self.worlds)),
+        )
+
+    def level_distribution(
+        self, bin_width: int = 50, by: str = "world"
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Bin edges and counts, one row per world (``by="world"``), per
+        vocation code (``by="vocation"``) or a single global row (``by=None``).
+        """
+        return self._cached(
+            ("levels", bin_width, by),
+            lambda: self._level_distribution(bin_width, by),
+        )
+
+    def _level_distribution(self, bin_width: int, by: str | None):
+        nbins = self.max_level // bin_width + 1
+        edges = np.arange(nbins + 1, dtype=np.int64) * bin_width
+        bins = self.levels // bin_width
+        if by is None:
+            return edges, np.bincount(bins, minlength=nbins)[np.newaxis]
+        if by == "world":
+            groups, ngroups = self.world_codes, len(self.worlds)
+        elif by == "vocation":
+            groups, ngroups = self.vocations.astype(np.int64), len(roster.VOCATIONS)
+        else:
+            raise ValueError(f"Unknown grouping {by!r}")
+        counts = np.bincount(groups * nbins + bins, minlength=ngroups * nbins)
+        return edges, counts.reshape(ngroups, nbins)
+
+    def vocation_mix(self) -> np.ndarray:
+        """Characters per world (rows) and vocation code (columns)."""
+
+        def mix():
+            nvocations = len(roster.VOCATIONS)
+            flat = self.world_codes * nvocations + self.vocations
+            counts = np.bincount(flat, minlength=len(self.worlds) * nvocations)
+            return counts.reshape(len(self.worlds), nvocations)
+
+        return self._cached(("vocations",), mix)
+
+    def sharer_density(self) -> tuple[np.ndarray, np.ndarray]:
+        """Online sharers per world (rows) for every level up to the highest.
+
+        Column ``level`` of a world's row matches
+        ``world_roster.sharers.count(level)``; summing the rows gives the
+        server-wide curve.
+        """
+        return self._cached(("sharers",), self._sharer_density)
+
+    def _sharer_density(self):
+        top = self.max_level
+        levels = np.arange(top + 1, dtype=np.int64)
+        flat = self.world_codes * (top + 1) + self.levels
+        histogram = np.bincount(flat, minlength=len(self.worlds) * (top + 1))
+        cumulative = np.cumsum(histogram.reshape(len(self.worlds), top + 1), axis=1)
+        # Prepend a zero column so that cumulative[:, x + 1] counts levels <= x.
+        cumulative = np.pad(cumulative, ((0, 0), (1, 0)))
+        lo = utils.min_sharer(levels)
+        hi = np.minimum(utils.max_sharer(levels), top)
+        return levels, cumulative[:, hi + 1] - cumulative[:, lo]
+
+    def stats(self) -> dict[str, np.ndarray]:
+        """Summed life, mana and cap per world."""
+
+        def stats():
+            values = vocation_stats(self.levels, self.vocations)
+            return {
+                stat: np.bincount(
+                    self.world_codes, weights=column, minlength=len(self.worlds)
+                ).astype(np.int64)
+                for stat, column in values.items()
+            }
+
+        return self._cached(("stats",), stats)
+
+    def to_frame(self):
+        """Per-world ``pandas.DataFrame`` of online count, levels and stats."""
+        import pandas as pd
+
+        online = self.online()
+        level_sums = np.bincount(
+            self.world_codes, weights=self.levels, minlength=len(self.worlds)
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_level = level_sums / online
+        frame = pd.DataFrame(
+            {"online": online, "mean_level": mean_level, **self.stats()},
+            index=pd.Index(self.worlds, name="world"),
+        )
+        mix = pd.DataFrame(
+            self.vocation_mix(),
+            index=frame.index,
+            columns=[v.value for v in roster.VOCATIONS],
+        )
+        return frame.join(mix)
+
+
+_last: tuple[tuple, tuple, Overview] | None = None
+_last_lock = threading.Lock()
+
+
+def overview(rosters: typing.Mapping[str, roster.OnlineRoster]) -> Overview:
+    """:class:`Overview` of ``rosters``, reused while the rosters are the same.
+
+    Unchanged polls hand back the same roster objects (see
+    :func:`tibia_stats.api.get_online_characters`), so repeated calls for one
+    snapshot share the aggregates computed so far.
+    """
+    global _last
+    key = tuple((world, id(chars)) for world, chars in rosters.items())
+    with _last_lock:
+        if _last is not None and _last[0] == key:
+            return _last[2]
+    result = Overview(rosters)
+    with _last_lock:
+        # Holding on to the rosters keeps their ids from being reused.
+        _last = (key, tuple(rosters.values()), result)
+    return result
@@ -2,88 +2,303 @@ __all__ = (
     "list_worlds",
     "get_world",
     "get_character",
+    "get_characters",
+    "CharacterResult",
     "get_online_characters",
+    "caches",
+    "share_caches",
     "count_sharers",
     "top_sharer",
     "top_percentage",
 )
 
+import collections
+import concurrent.futures
+import hashlib
+import threading
 import typing
 
-import bs4
-import requests
+from . import (
+    cache,
+    client,
+    errors,
+    metrics,
+    objects,
+    parsing,
+    ranking,
+    roster,
+    scheduler,
+    sharing,
+)
+
+caches = {
+    "world": cache.TTLCache(ttl=60 * 60, maxsize=128, stale=24 * 60 * 60),
+    "character": cache.TTLCache(ttl=5 * 60, maxsize=1024, stale=5 * 60),
+    "online": cache.TTLCache(ttl=60, maxsize=128, stale=60),
+}
+
+
+def share_caches(directory: str) -> None:
+    """Keep :data:`caches` in ``directory`` so processes share lookups."""
+    for resource, local in list(caches.items()):
+        caches[resource] = cache.SharedCache(
+            directory, resource, ttl=local.ttl, stale=local.stale
+        )
+
+
+_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+def _fetch(path: str, resource: str, world: str = "", **kw):
+    url = f"{client.BASE_URL}{path}"
+    admission = scheduler.get_scheduler()
+    http_client = client.get_client()
+    # Every attempt is admitted, so retries count against the rate and wait
+    # out the backoff the failure before them caused.
+    retries = getattr(http_client, "retries", 0)
+    for attempt in range(retries + 1):
+        admission.admit(world)
+        try:
+            with metrics.timed("network", resource, world):
+                response = http_client.get(url, **kw)
+        except OSError:
+            admission.failed()
+            if attempt == retries:
+                raise
+            continue
+        admission.feedback(response)
+        if response.status_code not in _RETRY_STATUSES:
+            break
+    if response.status_code not in (200, 304):
+        raise errors.HTTPStatusError(response.status_code, url)
+    return response
+
+
+class _Parsed(typing.NamedTuple):
+    etag: str | None
+    last_modified: str | None
+    digest: bytes
+    value: typing.Any
+
+
+# Validators, fragment digest and parsed value of the last response per URL.
+_parsed: collections.OrderedDict[str, _Parsed] = collections.OrderedDict()
+_parsed_lock = threading.Lock()
+_parsed_maxsize = 2048
 
-from . import objects, utils
+# Set to False to always parse, e.g. when benchmarking the parsers.
+revalidate = True
+revalidation = {"not_modified": 0, "unchanged": 0, "parsed": 0}
+
+
+def _count(outcome: str) -> None:
+    # Polls run on thread pools; += on a dict entry is not atomic.
+    with _parsed_lock:
+        revalidation[outcome] += 1
+
+
+def _fetch_parsed(
+    path: str,
+    resource: str,
+    world: str,
+    parse: typing.Callable[[str], typing.Any],
+):
+    """Fetch ``path`` and ``parse`` it, reusing the last result if unchanged.
+
+    Sends ``If-None-Match``/``If-Modified-Since`` when the previous response
+    carried validators and reuses the previous value on a 304. Otherwise the
+    table fragment the parser reads is hashed, and ``parse`` is skipped when
+    it matches the previous response's.
+    """
+    if not revalidate:
+        return parse(_fetch(path, resource, world).text)
+
+    with _parsed_lock:
+        previous = _parsed.get(path)
+    headers = {}
+    if previous is not None:
+        if previous.etag:
+            headers["If-None-Match"] = previous.etag
+        if previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
+
+    response = _fetch(path, resource, world, headers=headers)
+    if response.status_code == 304 and previous is not None:
+        _count("not_modified")
+        return previous.value
+
+    text = response.text
+    digest = hashlib.blake2b(
+        parsing.fragment(text, resource).encode(), digest_size=16
+    ).digest()
+    if previous is not None and previous.digest == digest:
+        _count("unchanged")
+        value = previous.value
+    else:
+        _count("parsed")
+        value = parse(text)
+
+    headers = getattr(response, "headers", None) or {}
+    parsed = _Parsed(headers.get("ETag"), headers.get("Last-Modified"), digest, value)
+    with _parsed_lock:
+        _parsed[path] = parsed
+        _parsed.move_to_end(path)
+        while len(_parsed) > _parsed_maxsize:
+            _parsed.popitem(last=False)
+    return value
 
 
 def list_worlds() -> typing.Iterator[objects.World]:
-    response = requests.get("https://www.tibia.com/community/?subtopic=worlds")
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
-    rows = list(
-        soup.find("table", class_="Table3").find_all("table", class_="TableContent")
-    )[2].find_all("tr")[1:]
-    for row in rows:
-        yield objects.World.from_row(row)
+    yield from _fetch_parsed(
+        "/community/?subtopic=worlds", "worlds", "", _parse_world_list
+    )
+
+
+def _parse_world_list(text: str) -> list[objects.World]:
+    with metrics.timed("parse", "worlds"):
+        rows = parsing.world_list_rows(text)
+    with metrics.timed("validate", "worlds"):
+        return objects.World.from_rows(
+            (cells, objects.World.parse_battle_eye_icon(icon)) for cells, icon in rows
+        )
 
 
 def get_world(world_name: str) -> objects.World:
-    response = requests.get(
-        f"https://www.tibia.com/community/?subtopic=worlds&world={world_name}"
+    return caches["world"].get_or_fetch(
+        world_name.lower(), lambda: _get_world(world_name)
     )
-    return objects.World.from_world_page(response.text, name=world_name)
 
 
-def get_character(char_name: str) -> objects.Character:
-    url = f"https://www.tibia.com/community/?subtopic=characters&name={char_name}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise Exception(f"{response.status_code=}")
+def _get_world(world_name: str) -> objects.World:
+    return _fetch_parsed(
+        f"/community/?subtopic=worlds&world={world_name}",
+        "world",
+        world_name,
+        lambda text: objects.World.from_world_page(text, name=world_name),
+    )
 
-    char = objects.Character.from_character_page(response.text)
-    char.world = get_world(char.world)
-    return char
 
+def get_character(char_name: str, fetch_world: bool = True) -> objects.Character:
+    char = caches["character"].get_or_fetch(
+        char_name.lower(), lambda: _get_character(char_name)
+    )
+    if not fetch_world:
+        return char.model_copy()
+    return char.model_copy(update={"world": get_world(char.world)})
 
-def get_online_characters(world: str) -> list:
-    url = f"https://www.tibia.com/community/?subtopic=worlds&world={world}&order=level_desc"
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise Exception(f"{response.status_code=}")
 
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
-    table = (
-        soup.find("table", class_="Table2")
-        .find("div", class_="InnerTableContainer")
-        .find("table")
-    )
-    rows = table.find_all("tr")[1:]
-    fields = ["Name", "Level", "Vocation"]
-    return [
-        objects.Character(
-            **dict(zip(fields, [utils.decode(c.text) for c in row.children]))
+def _get_character(char_name: str) -> objects.Character:
+    try:
+        return _fetch_parsed(
+            f"/community/?subtopic=characters&name={char_name}",
+            "character",
+            "",
+            objects.Character.from_character_page,
         )
-        for row in rows
-    ]
+    except errors.CharacterNotFound:
+        raise errors.CharacterNotFound(char_name) from None
+
+
+class CharacterResult(typing.NamedTuple):
+    name: str
+    character: objects.Character | None
+    error: Exception | None
+
+
+def get_characters(
+    names: typing.Iterable[str], fetch_world: bool = True, max_workers: int = 8
+) -> typing.Iterator[CharacterResult]:
+    """Look up many characters concurrently, yielding each as it finishes.
+
+    Names are deduplicated case-insensitively. Each distinct world is
+    fetched once, however many of the characters live there. A failed
+    lookup, of the character or of its world, is yielded with ``error`` set
+    instead of aborting the batch.
+    """
+    worlds: dict[str, concurrent.futures.Future] = {}
+    lock = threading.Lock()
+
+    def world(name: str) -> objects.World:
+        with lock:
+            future = worlds.get(name.lower())
+            owner = future is None
+            if owner:
+                future = worlds[name.lower()] = concurrent.futures.Future()
+        if owner:
+            try:
+                future.set_result(get_world(name))
+            except Exception as exc:
+                future.set_exception(exc)
+        return future.result()
+
+    def lookup(name: str) -> CharacterResult:
+        try:
+            char = get_character(name, fetch_world=False)
+            if fetch_world:
+                char.world = world(char.world)
+        except Exception as exc:
+            return CharacterResult(name, None, exc)
+        return CharacterResult(name, char, None)
+
+    unique: dict[str, str] = {}
+    for name in names:
+        unique.setdefault(name.lower(), name)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [pool.submit(lookup, name) for name in unique.values()]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_online_characters(world: str, refresh: bool = False) -> roster.OnlineRoster:
+    if refresh:
+        chars = _get_online_characters(world)
+        caches["online"].set(world.lower(), chars)
+        return chars
+    return caches["online"].get_or_fetch(
+        world.lower(), lambda: _get_online_characters(world)
+    )
+
+
+def _get_online_characters(world: str) -> roster.OnlineRoster:
+    chars = _fetch_parsed(
+        f"/community/?subtopic=worlds&world={world}&order=level_desc",
+        "online",
+        world,
+        lambda text: _parse_online(text, world),
+    )
+    scheduler.get_scheduler().polled(world)
+    return chars
+
+
+def _parse_online(text: str, world: str) -> roster.OnlineRoster:
+    with metrics.timed("parse", "online", world):
+        rows = parsing.online_rows(text)
+    with metrics.timed("validate", "online", world):
+        return roster.OnlineRoster.from_rows(rows)
+
+
+def _sharers(chars) -> sharing.SharerIndex:
+    if isinstance(chars, roster.OnlineRoster):
+        return chars.sharers
+    return sharing.SharerIndex.from_characters(chars)
+
+
+def _ranks(chars) -> ranking.RankIndex:
+    if isinstance(chars, roster.OnlineRoster):
+        return chars.ranks
+    return ranking.RankIndex.from_characters(chars)
 
 
 def count_sharers(chars: list, level: int) -> int:
-    min_lvl = utils.min_sharer(level)
-    max_lvl = utils.max_sharer(level)
-    levels = [c.level for c in chars]
-    return sum([levels.count(i) for i in range(min_lvl, max_lvl + 1)])
+    return _sharers(chars).count(level)
 
 
 def top_sharer(chars: list) -> tuple:
-    max_sharers = (0, 0)
-    levels = [c.level for c in chars]
-    for lvl in range(min(levels), max(levels)):
-        sharers = count_sharers(chars, lvl)
-        if sharers > max_sharers[1]:
-            max_sharers = (lvl, sharers)
-    return max_sharers
+    return _sharers(chars).top()
 
 
 def top_percentage(chars: list, my_level: int) -> float:
-    for i, c in enumerate(chars):
-        if c.level < my_level:
-            return i / len(chars)
+    return _ranks(chars).percentile(my_level)
@@ -1,12 +1,23 @@
 __all__ = ("app",)
 
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import uuid
+
 import dash
+import diskcache
+import flask
 import dash_mantine_components as dmc
-import pandas as pd
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+import plotly.subplots
 from dash_iconify import DashIconify
 
-from . import api, objects
+from . import api, cache, client, live, metrics, objects, ranking, roster, scheduler
 
 
 def vocation_badge(vocation):
@@ -45,7 +56,7 @@ def vocation_badge(vocation):
 
 
 def character_details(character, online):
-    is_online = any(online_char.name == character.name for online_char in online)
+    is_online = character.name in online
     color = "green" if is_online else "gray"
     return dmc.Stack(
         [
@@ -105,27 +116,143 @@ def character_details(character, online):
     )
 
 
-def level_graph(char, online, show_vocation: bool, lvl_group: int):
-    chars = pd.DataFrame.from_records([c.model_dump() for c in online])
-    pct = api.top_percentage(online, char.level)
-    title = f"Top {100*pct:.2f}% of {len(online)} Online Chars in {char.world.name}"
-    hist_kw = {"color": "vocation"} if show_vocation else {}
+def histogram_traces(edges, counts, show_vocation: bool, bin_width: int) -> list:
+    """Stacked bar traces of a level histogram; empty vocations are left out."""
+    if show_vocation:
+        labels = [v.value for v in roster.VOCATIONS]
+    else:
+        labels = ["level"]
+    colors = px.colors.qualitative.Plotly
+
+    traces = []
+    for code, (label, trace_counts) in enumerate(zip(labels, counts)):
+        (nonzero,) = np.nonzero(trace_counts)
+        if not len(nonzero):
+            continue
+        traces.append(
+            {
+                "type": "bar",
+                "x": edges[nonzero] + bin_width / 2,
+                "y": trace_counts[nonzero],
+                "width": bin_width,
+                "name": label,
+                "marker": {"color": colors[code % len(colors)]},
+                "customdata": np.column_stack((edges[nonzero], edges[nonzero + 1])),
+                "hovertemplate": (
+                    f"{label}<br>level %{{customdata[0]}}-%{{customdata[1]}}"
+                    "<br>%{y} online<extra></extra>"
+                ),
+            }
+        )
+    return traces
+
+
+def binned_histogram(online, show_vocation: bool, bin_width: int, rug_points: int):
+    edges, counts = online.level_histogram(bin_width, 3000, by_vocation=show_vocation)
+    if show_vocation:
+        labels = [v.value for v in roster.VOCATIONS]
+    else:
+        labels = ["level"]
+    colors = px.colors.qualitative.Plotly
+
+    rows = 2 if rug_points else 1
+    fig = plotly.subplots.make_subplots(
+        rows=rows,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.02,
+        row_heights=[0.15, 0.85] if rug_points else None,
+    )
+    for trace in histogram_traces(edges, counts, show_vocation, bin_width):
+        fig.add_trace(go.Bar(trace), row=rows, col=1)
+
+    if rug_points and len(online):
+        # Evenly spaced quantiles keep the rug's shape with a bounded size.
+        order = np.argsort(online.levels, kind="stable")
+        quantiles = np.linspace(0, len(order) - 1, min(rug_points, len(order)))
+        sample = order[np.unique(quantiles.astype(np.int64))]
+        if show_vocation:
+            codes = online.vocations[sample].tolist()
+        else:
+            codes = [0] * len(sample)
+        fig.add_trace(
+            go.Scatter(
+                x=online.levels[sample],
+                y=[labels[c] for c in codes],
+                mode="markers",
+                marker={
+                    "symbol": "line-ns-open",
+                    "color": [colors[c % len(colors)] for c in codes],
+                },
+                hovertext=[online.names[i] for i in sample],
+                hoverinfo="text+x",
+                showlegend=False,
+            ),
+            row=1,
+            col=1,
+        )
+        fig.update_yaxes(showticklabels=False, row=1, col=1)
+
+    fig.update_layout(barmode="stack", bargap=0, legend_title_text="vocation")
+    fig.update_xaxes(range=[0, 3000])
+    fig.update_xaxes(title_text="level", row=rows, col=1)
+    fig.update_yaxes(title_text="count", row=rows, col=1)
+    return fig
+
+
+def graph_title(pct: float, online: int, world: str) -> str:
+    return f"Top {100*pct:.2f}% of {online} Online Chars in {world}"
+
+
+def parse_bin_width(lvl_group) -> int:
     try:
-        nbins = int(3000 / int(lvl_group))
+        return int(lvl_group)
     except:
-        nbins = 60
-
-    fig = px.histogram(
-        chars,
-        marginal="rug",
-        x="level",
-        nbins=nbins,
-        range_x=[0, 3000],
-        # color_discrete_sequence=[char.world.color],
-        title=title,
-        hover_name="name",
-        **hist_kw,
-    )
+        return 50
+
+
+def level_graph(
+    char,
+    online,
+    show_vocation: bool,
+    lvl_group: int,
+    aggregate: bool = True,
+    rug_points: int = 0,
+):
+    world = char.world.name
+    with metrics.timed("figure", "level_graph", world):
+        fig = _level_graph(
+            char, online, show_vocation, lvl_group, aggregate, rug_points
+        )
+    # Dash would encode the figure after the callback returns, untimed.
+    # Encoding it here costs the same, and the plain result is cheap to
+    # re-encode.
+    with metrics.timed("serialize", "level_graph", world):
+        figure = json.loads(fig.to_json())
+    return dash.dcc.Graph(id="level-graph", figure=figure)
+
+
+def _level_graph(char, online, show_vocation, lvl_group, aggregate, rug_points):
+    pct = api.top_percentage(online, char.level)
+    title = graph_title(pct, len(online), char.world.name)
+    bin_width = parse_bin_width(lvl_group)
+
+    if aggregate:
+        fig = binned_histogram(online, show_vocation, bin_width, rug_points)
+        fig.update_layout(title=title)
+    else:
+        hist_kw = {"color": "vocation"} if show_vocation else {}
+        fig = px.histogram(
+            online.to_frame(),
+            marginal="rug",
+            x="level",
+            nbins=int(3000 / bin_width),
+            range_x=[0, 3000],
+            # color_discrete_sequence=[char.world.color],
+            title=title,
+            hover_name="name",
+            **hist_kw,
+        )
     fig.add_vline(x=char.level)
     fig.add_vrect(
         x0=char.min_sharing_lvl,
@@ -134,34 +261,181 @@ def level_graph(char, online, show_vocation: bool, lvl_group: int):
         fillcolor="blue",
         opacity=0.1,
     )
-    return dash.dcc.Graph(figure=fig)
+    return fig
+
+
+fetch_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+# Character lookups run here rather than in the request that starts them;
+# any server process can hand out the result, which is kept in ``get_jobs()``.
+job_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+JOB_TIMEOUT = 120
+
+
+def fetch_details(character_name: str):
+    with metrics.timed("fetch_details", "character"):
+        char = api.get_character(character_name, fetch_world=False)
+        world = fetch_pool.submit(api.get_world, char.world)
+        online = api.get_online_characters(char.world)
+        char.world = world.result()
+    return char, online
+
+
+def character_card(char, online):
+    return dmc.Center(
+        dmc.Card(
+            character_details(char, online),
+            withBorder=True,
+            shadow="sm",
+            radius="md",
+        )
+    )
+
+
+def fetch_error(character_name: str):
+    return dmc.Center(
+        dmc.Alert(
+            icon=DashIconify(icon="mdi:account-warning"),
+            children=f"Unable to fetch character {character_name!r}",
+            color="red",
+        ),
+    )
+
+
+def dump_details(char, online) -> dict:
+    return {
+        "name": char.name,
+        "level": char.level,
+        "vocation": char.vocation,
+        "world": char.world.model_dump(mode="json"),
+        "online": online.to_dict(),
+    }
+
+
+def load_details(data: dict):
+    char = objects.Character(
+        Name=data["name"],
+        Level=data["level"],
+        Vocation=data["vocation"],
+        World=objects.World.model_validate(data["world"], by_name=True),
+    )
+    return char, roster.OnlineRoster.from_dict(data["online"])
+
+
+def run_details_job(job_id: str, character_name: str) -> None:
+    try:
+        char, online = fetch_details(character_name)
+    except Exception:
+        result = [fetch_error(character_name)], None
+    else:
+        result = [character_card(char, online)], dump_details(char, online)
+    get_jobs().set(("job", job_id), result, expire=JOB_TIMEOUT)
+
+
+_live_bars: dict[tuple, tuple[list, list | None]] = {}
+_live_bars_lock = threading.Lock()
+
+
+def _bar_changes(current: list, previous: list) -> list | None:
+    """``(trace, property, value)`` assignments turning the ``previous`` bars
+    into ``current``, or ``None`` if the traces themselves differ. A dict
+    value assigns single elements by index.
+    """
+    if [t["name"] for t in current] != [t["name"] for t in previous]:
+        return None
+    changes = []
+    for i, (new, old) in enumerate(zip(current, previous)):
+        if not np.array_equal(new["x"], old["x"]):
+            changes.extend((i, prop, new[prop]) for prop in ("x", "y", "customdata"))
+            continue
+        (changed,) = np.nonzero(new["y"] != old["y"])
+        # A single count costs about as much as a few of a whole array.
+        if 4 * len(changed) < len(new["y"]):
+            values = dict(zip(changed.tolist(), new["y"][changed].tolist()))
+            changes.append((i, "y", values))
+        elif len(changed):
+            changes.append((i, "y", new["y"]))
+    return changes
+
+
+def live_bars(frame: live.Frame, world: str, show_vocation: bool, bin_width: int):
+    """Bar traces of ``frame`` and the changes from the frame before it.
+
+    Computed once per frame and graph setting, and shared by every viewer.
+    """
+    key = (world.lower(), frame.seq, show_vocation, bin_width)
+    with _live_bars_lock:
+        if (bars := _live_bars.get(key)) is not None:
+            return bars
+    current, previous = (
+        [
+            # Live graphs have no rug, so the bars are on the only subplot.
+            {**trace, "xaxis": "x", "yaxis": "y"}
+            for trace in histogram_traces(
+                *live.rebin(histogram, bin_width, show_vocation),
+                show_vocation,
+                bin_width,
+            )
+        ]
+        for histogram in (frame.histogram, frame.previous_histogram())
+    )
+    bars = (current, _bar_changes(current, previous))
+    with _live_bars_lock:
+        _live_bars[key] = bars
+        while len(_live_bars) > 256:
+            del _live_bars[next(iter(_live_bars))]
+    return bars
+
+
+def live_patch(
+    frame: live.Frame,
+    rank: ranking.RankIndex,
+    seen,
+    char_level,
+    world,
+    show_vocation,
+    bin_width,
+):
+    """Patch of the level graph showing frame ``seen`` so that it shows ``frame``.
+
+    A viewer one frame behind gets only the counts that changed; anyone else
+    gets all bars. Axes, shapes and the rest of the layout stay.
+    """
+    current, changes = live_bars(frame, world, show_vocation, bin_width)
+    patch = dash.Patch()
+    if seen == frame.seq - 1 and changes is not None:
+        data = patch["data"]
+        for i, prop, value in changes:
+            if isinstance(value, dict):
+                target = data[i][prop]
+                for j, count in value.items():
+                    target[j] = count
+            else:
+                data[i][prop] = value
+    else:
+        patch["data"] = current
+    patch["layout"]["title"]["text"] = graph_title(
+        rank.percentile(char_level), frame.online, world
+    )
+    return patch
+
+
+def live_status(frame: live.Frame) -> str:
+    at = time.strftime("%H:%M:%S", time.localtime(frame.at))
+    return (
+        f"{frame.online} online, {len(frame.logins)} logged in and "
+        f"{len(frame.logouts)} logged out since the last update at {at}"
+    )
 
 
 def full_details(character_name: str, show_vocation: bool, lvl_group: int):
     try:
-        char = api.get_character(character_name)
-        online = api.get_online_characters(char.world.name)
+        char, online = fetch_details(character_name)
         return [
-            dmc.Center(
-                dmc.Card(
-                    character_details(char, online),
-                    withBorder=True,
-                    shadow="sm",
-                    radius="md",
-                )
-            ),
+            character_card(char, online),
             level_graph(char, online, show_vocation, lvl_group),
         ]
     except Exception:
-        return [
-            dmc.Center(
-                dmc.Alert(
-                    icon=DashIconify(icon="mdi:account-warning"),
-                    children=f"Unable to fetch character {character_name!r}",
-                    color="red",
-                ),
-            )
-        ]
+        return [fetch_error(character_name)]
 
 
 dash._dash_renderer._set_react_version("18.2.0")
@@ -183,7 +457,109 @@ grid_options = dmc.Group(
     align="flex-end",
 )
 
-app = dash.Dash()
+LIVE_INTERVAL = float(os.getenv("TIBIA_STATS_LIVE_INTERVAL", 30))
+_jobs: diskcache.Cache | None = None
+_broadcaster: live.Broadcaster | None = None
+_jobs_lock = threading.Lock()
+
+
+def get_jobs() -> diskcache.Cache:
+    """Store shared by server processes, created on first use.
+
+    Job results, live frames and published metrics are kept here, in
+    ``TIBIA_STATS_JOBS`` or the per-user cache directory.
+    """
+    global _jobs
+    if _jobs is None:
+        with _jobs_lock:
+            if _jobs is None:
+                _jobs = diskcache.Cache(
+                    cache.private_directory("jobs", os.getenv("TIBIA_STATS_JOBS"))
+                )
+    return _jobs
+
+
+def get_broadcaster() -> live.Broadcaster:
+    global _broadcaster
+    if _broadcaster is None:
+        store = get_jobs()
+        with _jobs_lock:
+            if _broadcaster is None:
+                _broadcaster = live.Broadcaster(store, interval=LIVE_INTERVAL)
+    return _broadcaster
+
+
+app = dash.Dash(
+    # The level graph is only in the layout once a character is shown.
+    suppress_callback_exceptions=True,
+)
+
+
+@app.server.before_request
+def start_timer():
+    if metrics.enabled:
+        flask.g.started_at = time.perf_counter()
+
+
+@app.server.after_request
+def record_request(response):
+    if (started_at := flask.g.pop("started_at", None)) is not None:
+        elapsed = time.perf_counter() - started_at
+        # Label by route, not path, to keep the number of series bounded.
+        rule = flask.request.url_rule
+        route = rule.rule if rule is not None else "404"
+        metrics.stage_seconds.observe(elapsed, "request", route, "")
+        metrics.publish_periodically(get_jobs())
+    return response
+
+
+@app.server.route("/metrics")
+def metrics_endpoint():
+    # Other processes publish periodically; include this one's latest.
+    metrics.publish(get_jobs())
+    cache_stats = {
+        (resource, stat): value
+        for resource, cache in api.caches.items()
+        for stat, value in cache.stats().items()
+    }
+    http_stats = {(stat,): value for stat, value in client.get_client().stats().items()}
+    body = metrics.render(
+        metrics.published(get_jobs()),
+        metrics.render_samples(
+            "tibia_stats_cache",
+            "Lookup cache counters and sizes.",
+            "gauge",
+            ("resource", "stat"),
+            cache_stats,
+        ),
+        metrics.render_samples(
+            "tibia_stats_revalidation",
+            "Polled pages served from the last parse, or parsed again.",
+            "counter",
+            ("outcome",),
+            {(outcome,): n for outcome, n in api.revalidation.items()},
+        ),
+        metrics.render_samples(
+            "tibia_stats_http",
+            "Outbound HTTP client requests and connection pool usage.",
+            "gauge",
+            ("stat",),
+            http_stats,
+        ),
+        metrics.render_samples(
+            "tibia_stats_scheduler",
+            "Outbound request queue depth, waits and current rate.",
+            "gauge",
+            ("stat",),
+            {
+                (stat,): value
+                for stat, value in scheduler.get_scheduler().stats().items()
+            },
+        ),
+    )
+    return flask.Response(body, mimetype="text/plain; version=0.0.4")
+
+
 app.layout = dmc.MantineProvider(
     dmc.Stack(
         [
@@ -206,6 +582,17 @@ app.layout = dmc.MantineProvider(
                 ),
             ),
             dmc.Stack([], id="char-details"),
+            dmc.Stack([], id="char-graph"),
+            dmc.Text(id="live-status", size="sm", c="dimmed", ta="center"),
+            dash.dcc.Store(id="char-job"),
+            dash.dcc.Interval(id="char-poll", interval=250, disabled=True),
+            dash.dcc.Store(id="char-data"),
+            dash.dcc.Store(id="live-seq"),
+            dash.dcc.Interval(
+                id="live-interval",
+                interval=LIVE_INTERVAL * 1000,
+                disabled=True,
+            ),
         ],
         pos="relative",
     )
@@ -224,21 +611,108 @@ dash.clientside_callback(
     dash.Input("char-name", "value"),
 )
 
+dash.clientside_callback(
+    """function disable(data) { return !data; }""",
+    dash.Output("live-interval", "disabled"),
+    dash.Input("char-data", "data"),
+)
+
 
 @dash.callback(
-    dash.Output("char-details", "children"),
+    dash.Output("char-job", "data"),
+    dash.Output("char-poll", "disabled"),
     dash.Output("loading-overlay", "visible"),
     dash.Input("char-submit", "n_clicks"),
     dash.State("char-name", "value"),
+    prevent_initial_call=True,
+)
+def start_details(_n, char_name):
+    if not char_name:
+        return dash.no_update, dash.no_update, False
+
+    job = {"id": uuid.uuid4().hex, "name": char_name, "started": time.time()}
+    job_pool.submit(run_details_job, job["id"], char_name)
+    return job, False, True
+
+
+@dash.callback(
+    dash.Output("char-details", "children"),
+    dash.Output("char-data", "data"),
+    dash.Output("loading-overlay", "visible", allow_duplicate=True),
+    dash.Output("char-poll", "disabled", allow_duplicate=True),
+    dash.Input("char-poll", "n_intervals"),
+    dash.State("char-job", "data"),
+    prevent_initial_call=True,
+)
+def populate_details(_n, job):
+    if not job:
+        return dash.no_update, dash.no_update, False, True
+
+    jobs = get_jobs()
+    result = jobs.get(("job", job["id"]))
+    if result is None:
+        if time.time() - job["started"] < JOB_TIMEOUT:
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+        # The process running the job died or was restarted.
+        return [fetch_error(job["name"])], None, False, True
+    jobs.delete(("job", job["id"]))
+    details, data = result
+    return details, data, False, True
+
+
+@dash.callback(
+    dash.Output("char-graph", "children"),
+    dash.Output("live-seq", "data"),
+    dash.Output("live-status", "children"),
+    dash.Input("char-data", "data"),
+    dash.Input("show-vocation", "checked"),
+    dash.Input("lvl-group", "value"),
+)
+def render_graph(data, show_vocation, lvl_group):
+    if not data:
+        return [], None, ""
+
+    char, online = load_details(data)
+    world = char.world.name
+    # The first live tick: start polling now rather than one interval later.
+    broadcaster = get_broadcaster()
+    broadcaster.watch(world)
+    seq, status = None, ""
+    # Start from the live roster when there is one, as later patches do.
+    if latest := broadcaster.latest_roster(world, 2 * broadcaster.interval):
+        seq, online = latest
+        if (frame := broadcaster.frame(world)) is not None and frame.seq == seq:
+            status = live_status(frame)
+    return [level_graph(char, online, show_vocation, lvl_group)], seq, status
+
+
+@dash.callback(
+    dash.Output("level-graph", "figure"),
+    dash.Output("live-status", "children", allow_duplicate=True),
+    dash.Output("live-seq", "data", allow_duplicate=True),
+    dash.Input("live-interval", "n_intervals"),
+    dash.State("char-data", "data"),
     dash.State("show-vocation", "checked"),
     dash.State("lvl-group", "value"),
+    dash.State("live-seq", "data"),
     prevent_initial_call=True,
 )
-def populate_details(_n, char_name, show_vocation, lvl_group):
-    if not char_name:
-        return dash.no_update, False
+def live_update(_n, data, show_vocation, lvl_group, seen):
+    if not data:
+        return dash.no_update, dash.no_update, dash.no_update
 
-    return full_details(char_name, show_vocation, lvl_group), False
+    world = data["world"]["name"]
+    broadcaster = get_broadcaster()
+    broadcaster.watch(world)
+    latest = broadcaster.latest(world)
+    bin_width = parse_bin_width(lvl_group)
+    if latest is None or latest[0].seq == seen or bin_width % live.BIN_WIDTH:
+        return dash.no_update, dash.no_update, dash.no_update
+    frame, rank = latest
+    patch = live_patch(
+        frame, rank, seen, data["level"], world, show_vocation, bin_width
+    )
+    return patch, live_status(frame), frame.seq
 
 
 if __name__ == "__main__":
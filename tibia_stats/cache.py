@@ -0,0 +1,295 @@
+__all__ = (
+    "TTLCache",
+    "SharedCache",
+    "NoCache",
+    "private_directory",
+)
+
+import collections
+import concurrent.futures
+import os
+import threading
+import time
+import typing
+import uuid
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry.
+
+    Entries younger than ``ttl`` are served as hits. Entries younger than
+    ``ttl + stale`` are served immediately while a single background refresh
+    runs (stale-while-revalidate). Concurrent misses for the same key share a
+    single call to ``fetch``.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 256, stale: float = 0):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale = stale
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self._data: collections.OrderedDict = collections.OrderedDict()
+        self._inflight: dict[typing.Hashable, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_or_fetch(
+        self, key: typing.Hashable, fetch: typing.Callable[[], typing.Any]
+    ):
+        with self._lock:
+            if (entry := self._data.get(key)) is not None:
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.stale:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        future = self._inflight[key] = concurrent.futures.Future()
+                        refresh = threading.Thread(
+                            target=self._refresh, args=(key, fetch, future)
+                        )
+                        refresh.daemon = True
+                        refresh.start()
+                    return value
+
+            if (future := self._inflight.get(key)) is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = self._inflight[key] = concurrent.futures.Future()
+                owner = True
+
+        if not owner:
+            return future.result()
+        return self._load(key, fetch, future)
+
+    def _load(self, key, fetch, future: concurrent.futures.Future):
+        try:
+            value = fetch()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            self._store(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def _refresh(self, key, fetch, future: concurrent.futures.Future):
+        try:
+            self._load(key, fetch, future)
+        except Exception:
+            # Keep serving the stale entry until it falls out of the window.
+            pass
+
+    def _store(self, key, value):
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def set(self, key: typing.Hashable, value) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key: typing.Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "coalesced": self.coalesced,
+            "size": len(self._data),
+        }
+
+
+class SharedCache:
+    """:class:`TTLCache` stored in a diskcache directory shared by processes.
+
+    Server workers and background jobs using the same ``directory`` (and
+    ``prefix``) see each other's entries, so a world is scraped once rather
+    than once per process. A miss takes a short-lived lock entry; other
+    processes missing the same key wait for the owner's result for up to
+    ``lock_timeout`` seconds before fetching it themselves. Expiry uses wall
+    clock time since entries outlive the process that stored them, and the
+    directory as a whole is bounded by ``size_limit`` bytes rather than by an
+    entry count.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        prefix: str,
+        ttl: float,
+        stale: float = 0,
+        lock_timeout: float = 30,
+        size_limit: int = 2**30,
+    ):
+        import diskcache
+
+        self.prefix = prefix
+        self.ttl = ttl
+        self.stale = stale
+        self.lock_timeout = lock_timeout
+        # Entries linger for the stale window, then diskcache evicts them.
+        self.expire = ttl + stale
+        self._cache = diskcache.Cache(directory, size_limit=size_limit)
+        # Only used to coalesce misses within this process; holds no entries.
+        self._local = TTLCache(0, maxsize=0)
+
+    def _key(self, key) -> tuple:
+        return (self.prefix, key)
+
+    def _count(self, stat: str) -> None:
+        self._cache.incr(("stats", self.prefix, stat))
+
+    def __len__(self) -> int:
+        return sum(1 for k in self._cache.iterkeys() if k[0] == self.prefix)
+
+    def get_or_fetch(
+        self, key: typing.Hashable, fetch: typing.Callable[[], typing.Any]
+    ):
+        entry = self._cache.get(self._key(key))
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                self._count("hits")
+                return value
+            if age < self.ttl + self.stale:
+                self._count("stale_hits")
+                if (token := self._lock(key)) is not None:
+                    refresh = threading.Thread(
+                        target=self._refresh, args=(key, fetch, token), daemon=True
+                    )
+                    refresh.start()
+                return value
+
+        # Concurrent misses within this process share one _load call.
+        return self._local.get_or_fetch(key, lambda: self._load(key, fetch))
+
+    def _lock(self, key) -> str | None:
+        """Take the lock on ``key``; return its token, or None if it is held."""
+        token = uuid.uuid4().hex
+        if self._cache.add(("lock", self.prefix, key), token, expire=self.lock_timeout):
+            return token
+        return None
+
+    def _unlock(self, key, token: str) -> None:
+        # The lock may have expired and been taken by another process.
+        with self._cache.transact():
+            if self._cache.get(("lock", self.prefix, key)) == token:
+                self._cache.delete(("lock", self.prefix, key))
+
+    def _load(self, key, fetch):
+        token = self._lock(key)
+        if token is None:
+            self._count("coalesced")
+            deadline = time.monotonic() + self.lock_timeout
+            while token is None and time.monotonic() < deadline:
+                time.sleep(0.05)
+                if (entry := self._cache.get(self._key(key))) is not None:
+                    if time.time() - entry[1] < self.ttl:
+                        return entry[0]
+                # Take over once the owner is done or gone.
+                token = self._lock(key)
+            if token is None:
+                # The owner overran lock_timeout, so its lock has expired.
+                token = self._lock(key)
+        self._count("misses")
+        try:
+            value = fetch()
+            self.set(key, value)
+        finally:
+            if token is not None:
+                self._unlock(key, token)
+        return value
+
+    def _refresh(self, key, fetch, token):
+        try:
+            self.set(key, fetch())
+        except Exception:
+            # Keep serving the stale entry until it falls out of the window.
+            pass
+        finally:
+            self._unlock(key, token)
+
+    def set(self, key: typing.Hashable, value) -> None:
+        self._cache.set(self._key(key), (value, time.time()), expire=self.expire)
+
+    def invalidate(self, key: typing.Hashable) -> None:
+        self._cache.delete(self._key(key))
+
+    def clear(self) -> None:
+        for key in list(self._cache.iterkeys()):
+            if key[0] == self.prefix:
+                self._cache.delete(key)
+
+    def stats(self) -> dict[str, int]:
+        stats = {
+            stat: self._cache.get(("stats", self.prefix, stat), 0)
+            for stat in ("hits", "misses", "stale_hits", "coalesced")
+        }
+        stats["size"] = len(self)
+        return stats
+
+
+def private_directory(name: str, path: str | os.PathLike | None = None) -> str:
+    """``path``, or the per-user cache directory ``name``, once it is private.
+
+    Shared caches unpickle what they read, so a directory that another user
+    owns or may write to is refused rather than trusted.
+    """
+    if path is None:
+        import platformdirs
+
+        path = os.path.join(platformdirs.user_cache_dir("tibia-stats"), name)
+    path = os.fspath(path)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    if (hasattr(os, "getuid") and info.st_uid != os.getuid()) or info.st_mode & 0o022:
+        raise PermissionError(
+            f"{path} must be owned by and writable only by the current user"
+        )
+    return path
+
+
+class NoCache:
+    """Drop-in replacement for :class:`TTLCache` that always fetches."""
+
+    def get_or_fetch(
+        self, key: typing.Hashable, fetch: typing.Callable[[], typing.Any]
+    ):
+        return fetch()
+
+    def set(self, key: typing.Hashable, value) -> None:
+        pass
+
+    def invalidate(self, key: typing.Hashable) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        return {}
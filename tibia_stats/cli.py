@@ -1,8 +1,153 @@
+__all__ = ("main",)
+
+import json
+import os
+
 import rich_click as click
 
 
-@click.command()
-def main():
-    from .__main__ import run
+@click.group(invoke_without_command=True)
+@click.pass_context
+def main(ctx):
+    if ctx.invoked_subcommand is None:
+        from .__main__ import run
+
+        run()
+
+
+def _select_worlds(api, names):
+    try:
+        # list_worlds is a generator; it only fetches once consumed.
+        all_worlds = list(api.list_worlds())
+    except Exception as exc:
+        raise click.ClickException(f"Could not list worlds: {exc!r}") from exc
+    if names:
+        wanted = {w.lower() for w in names}
+        all_worlds = [w for w in all_worlds if w.name.lower() in wanted]
+    return all_worlds
+
+
+@main.command()
+@click.argument("worlds", nargs=-1)
+@click.option("--workers", default=16, show_default=True, help="Concurrent fetches.")
+@click.option(
+    "--rate", default=10.0, show_default=True, help="Maximum requests per second."
+)
+@click.option(
+    "--timeout", default=10.0, show_default=True, help="Per-request timeout (s)."
+)
+@click.option("--json", "as_json", is_flag=True, help="Emit one JSON line per world.")
+@click.option(
+    "--store",
+    type=click.Path(file_okay=False),
+    help="Append every roster to a snapshot store in this directory.",
+)
+def crawl(worlds, workers, rate, timeout, as_json, store):
+    """Fetch the online list of every world (or only WORLDS)."""
+    from . import api, client
+    from .crawler import crawl as crawl_worlds
+    from .store import SnapshotStore
+
+    client.set_client(client.default_client(timeout=timeout))
+    snapshots = SnapshotStore(store) if store else None
+    all_worlds = _select_worlds(api, worlds)
+
+    failed = 0
+    for result in crawl_worlds(all_worlds, max_workers=workers, rate=rate):
+        if result.error is not None:
+            failed += 1
+            click.echo(f"{result.world.name}: {result.error!r}", err=True)
+            continue
+        if snapshots is not None:
+            snapshots.append(result.world, result.characters)
+        if as_json:
+            chars = result.characters
+            record = {
+                "world": result.world.name,
+                "online": len(chars),
+                "characters": list(
+                    zip(chars.names, chars.levels.tolist(), chars.vocation_labels())
+                ),
+            }
+            click.echo(json.dumps(record))
+        else:
+            click.echo(
+                f"{result.world.name:<16}{len(result.characters):>6} online"
+                f"{result.elapsed:>8.2f}s"
+            )
+
+    if failed:
+        raise click.ClickException(f"{failed} world(s) failed")
+
+
+@main.command()
+@click.argument("directory", type=click.Path(file_okay=False))
+@click.argument("worlds", nargs=-1)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["parquet", "ipc", "csv"]),
+    default="parquet",
+    show_default=True,
+    help="Parquet and Arrow IPC need pyarrow.",
+)
+@click.option("--workers", default=16, show_default=True, help="Concurrent fetches.")
+@click.option(
+    "--rate", default=10.0, show_default=True, help="Maximum requests per second."
+)
+@click.option(
+    "--timeout", default=10.0, show_default=True, help="Per-request timeout (s)."
+)
+def export(directory, worlds, fmt, workers, rate, timeout):
+    """Write the world list and every world's online roster to DIRECTORY,
+    one row group per world as it arrives. With WORLDS, both files only
+    cover those worlds.
+    """
+    from . import api, client
+    from .export import export as export_worlds
+
+    client.set_client(client.default_client(timeout=timeout))
+    results = export_worlds(
+        directory, fmt, _select_worlds(api, worlds), max_workers=workers, rate=rate
+    )
+    failed = rows = 0
+    try:
+        for result in results:
+            if result.error is not None:
+                failed += 1
+                click.echo(f"{result.world.name}: {result.error!r}", err=True)
+            else:
+                rows += len(result.characters)
+    except ImportError as exc:
+        raise click.ClickException(f"{exc} (pip install pyarrow)") from exc
+
+    click.echo(f"Wrote {rows} characters to {directory}", err=True)
+    if failed:
+        raise click.ClickException(f"{failed} world(s) failed")
+
+
+@main.command()
+@click.option("--host", envvar="HOST", default="0.0.0.0", show_default=True)
+@click.option("--port", envvar="PORT", default=10_000, show_default=True)
+@click.option(
+    "--workers",
+    type=int,
+    default=lambda: 2 * (os.cpu_count() or 1) + 1,
+    show_default="2 x CPUs + 1",
+    help="Worker processes.",
+)
+@click.option("--threads", default=4, show_default=True, help="Threads per worker.")
+@click.option("--timeout", default=120, show_default=True, help="Worker timeout (s).")
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="Lookup cache shared by all workers "
+    "(default: 'shared' in the per-user cache directory).",
+)
+def serve(host, port, workers, threads, timeout, cache_dir):
+    """Run the web app with gunicorn for production use."""
+    from .__main__ import serve as serve_app
 
-    run()
+    if cache_dir:
+        os.environ["TIBIA_STATS_CACHE"] = cache_dir
+    serve_app(host, port, workers=workers, threads=threads, timeout=timeout)
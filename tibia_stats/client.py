@@ -0,0 +1,242 @@
+__all__ = (
+    "Client",
+    "RateLimiter",
+    "SharedRateLimiter",
+    "default_client",
+    "get_client",
+    "set_client",
+)
+
+import os
+import threading
+import time
+import typing
+
+import requests
+import requests.adapters
+import urllib3.util
+
+BASE_URL = "https://www.tibia.com"
+
+
+class Client:
+    """Pooled keep-alive HTTP client used for every tibia.com request.
+
+    Anything with a compatible ``get(url, **kw)`` method returning an object
+    with ``status_code`` and ``text`` can be passed to :func:`set_client`
+    instead, e.g. a local stub for tests.
+
+    The adapter itself never retries: the api resends a failed request up to
+    ``retries`` times, each time through the :mod:`scheduler`, so retries
+    count against the request budget and wait out any backoff.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        retries: int = 3,
+        pool_size: int = 10,
+        session: requests.Session | None = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.requests = 0
+        self.failures = 0
+        # Requests are sent from thread pools; += on an attribute is not atomic.
+        self._counts_lock = threading.Lock()
+        self.session = session or requests.Session()
+        self.session.headers.update(
+            urllib3.util.make_headers(keep_alive=True, accept_encoding=True)
+        )
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=0,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, **kw) -> requests.Response:
+        kw.setdefault("timeout", self.timeout)
+        with self._counts_lock:
+            self.requests += 1
+        try:
+            response = self.session.get(url, **kw)
+        except Exception:
+            self._failed()
+            raise
+        if response.status_code >= 400:
+            self._failed()
+        return response
+
+    def _failed(self) -> None:
+        with self._counts_lock:
+            self.failures += 1
+
+    def stats(self) -> dict[str, int]:
+        pools = []
+        if manager := getattr(self.session.get_adapter(BASE_URL), "poolmanager", None):
+            keys = manager.pools.keys()
+            pools = [p for key in keys if (p := manager.pools.get(key)) is not None]
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "pools": len(pools),
+            "connections": sum(p.num_connections for p in pools),
+            "idle_connections": sum(p.pool.qsize() for p in pools if p.pool),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+class RateLimiter:
+    """Token bucket shared by every thread that calls :meth:`acquire`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Block until a request may be sent and return the time waited."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now."""
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def drain(self, seconds: float) -> None:
+        """Hold every caller back for at least ``seconds``."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class SharedRateLimiter:
+    """:class:`RateLimiter` whose bucket is kept in a diskcache directory.
+
+    Every process using the same ``directory`` (and ``key``) draws from one
+    bucket, so server workers and background jobs share a single request
+    budget; the rate is shared as well. Wall clock time is used since the
+    bucket outlives the process that created it.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        rate: float,
+        burst: int = 1,
+        key: str = "rate-limit",
+    ):
+        import diskcache
+
+        self.burst = burst
+        self.key = key
+        self._cache = diskcache.Cache(directory)
+        self._default = rate
+        self.rate = rate
+
+    def _state(self, now: float) -> tuple[float, float]:
+        tokens, updated, rate = self._cache.get(
+            self.key, (float(self.burst), now, self._default)
+        )
+        return min(self.burst, tokens + max(now - updated, 0) * rate), rate
+
+    @property
+    def rate(self) -> float:
+        return self._cache.get(self.key, (0, 0, self._default))[2]
+
+    @rate.setter
+    def rate(self, rate: float) -> None:
+        with self._cache.transact():
+            now = time.time()
+            tokens, _ = self._state(now)
+            self._cache.set(self.key, (tokens, now, rate))
+
+    def acquire(self) -> float:
+        """Block until a request may be sent and return the time waited."""
+        with self._cache.transact():
+            now = time.time()
+            tokens, rate = self._state(now)
+            tokens -= 1
+            self._cache.set(self.key, (tokens, now, rate))
+        wait = -tokens / rate if tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now."""
+        with self._cache.transact():
+            now = time.time()
+            tokens, rate = self._state(now)
+            if tokens < 1:
+                return False
+            self._cache.set(self.key, (tokens - 1, now, rate))
+            return True
+
+    def drain(self, seconds: float) -> None:
+        """Hold every caller back for at least ``seconds``."""
+        with self._cache.transact():
+            now = time.time()
+            tokens, rate = self._state(now)
+            self._cache.set(self.key, (min(tokens, -seconds * rate), now, rate))
+
+
+_client: typing.Any = None
+_client_lock = threading.Lock()
+
+
+def default_client(**kw) -> Client:
+    """A :class:`Client` configured from the environment.
+
+    ``TIBIA_STATS_TIMEOUT`` and ``TIBIA_STATS_RETRIES`` give the defaults,
+    which ``kw`` overrides, and ``TIBIA_STATS_REPLAY`` / ``TIBIA_STATS_RECORD``
+    are applied on top (see :mod:`tibia_stats.replay`).
+    """
+    kw.setdefault("timeout", float(os.getenv("TIBIA_STATS_TIMEOUT", 10)))
+    kw.setdefault("retries", int(os.getenv("TIBIA_STATS_RETRIES", 3)))
+    client = Client(**kw)
+    if os.getenv("TIBIA_STATS_REPLAY") or os.getenv("TIBIA_STATS_RECORD"):
+        from . import replay
+
+        replay.configure_from_env(client)
+    return client
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            # Configure before publishing so that no thread can use the
+            # client before replay is mounted on it.
+            if _client is None:
+                _client = default_client()
+    return _client
+
+
+def set_client(client):
+    """Install ``client`` for all api calls and return the previous one."""
+    global _client
+    previous, _client = _client, client
+    return previous
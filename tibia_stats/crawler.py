@@ -0,0 +1,56 @@
+__all__ = ("CrawlResult", "crawl")
+
+import concurrent.futures
+import contextlib
+import time
+import typing
+
+from . import api, objects, roster, scheduler
+
+
+class CrawlResult(typing.NamedTuple):
+    world: objects.World
+    characters: roster.OnlineRoster | None
+    error: Exception | None
+    elapsed: float
+
+
+def crawl(
+    worlds: typing.Iterable[objects.World] | None = None,
+    max_workers: int = 16,
+    rate: float | None = None,
+) -> typing.Iterator[CrawlResult]:
+    """Fetch the online list of every world concurrently.
+
+    Results are yielded as each world finishes. Failed worlds are yielded
+    with ``error`` set instead of aborting the crawl. Requests go through
+    the :mod:`scheduler` as crawl traffic: interactive lookups overtake
+    them, and the stalest worlds are fetched first. ``rate`` replaces the
+    scheduler's requests per second until the crawl ends; per-request
+    timeouts come from the installed :mod:`client`.
+    """
+    if worlds is None:
+        worlds = api.list_worlds()
+    admission = scheduler.get_scheduler()
+    by_name = {world.name: world for world in worlds}
+
+    def fetch(world: objects.World) -> CrawlResult:
+        start = time.perf_counter()
+        try:
+            with scheduler.crawling():
+                chars = api.get_online_characters(world.name, refresh=True)
+        except Exception as exc:
+            return CrawlResult(world, None, exc, time.perf_counter() - start)
+        return CrawlResult(world, chars, None, time.perf_counter() - start)
+
+    limit = contextlib.nullcontext() if rate is None else admission.limit(rate)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    with limit:
+        try:
+            futures = [
+                pool.submit(fetch, by_name[name]) for name in admission.due(by_name)
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,101 @@
+__all__ = (
+    "EventKind",
+    "RosterEvent",
+    "RosterDiffer",
+    "diff_rosters",
+)
+
+import enum
+import threading
+import typing
+
+from . import roster
+
+
+class EventKind(enum.StrEnum):
+    LOGIN = enum.auto()
+    LOGOUT = enum.auto()
+    LEVEL_UP = enum.auto()
+    DEATH_SUSPECT = enum.auto()
+
+
+class RosterEvent(typing.NamedTuple):
+    kind: EventKind
+    world: str
+    name: str
+    level: int
+    previous_level: int | None = None
+
+
+def diff_rosters(
+    previous: roster.OnlineRoster, current: roster.OnlineRoster, world: str = ""
+) -> typing.Iterator[RosterEvent]:
+    """Events turning ``previous`` into ``current`` in one pass over each."""
+    previous_index = previous.name_index
+    previous_levels = previous.levels.tolist()
+    current_index = current.name_index
+    current_levels = current.levels.tolist()
+
+    for name, level in zip(current.names, current_levels):
+        if (i := previous_index.get(name)) is None:
+            yield RosterEvent(EventKind.LOGIN, world, name, level)
+        elif level > (old := previous_levels[i]):
+            yield RosterEvent(EventKind.LEVEL_UP, world, name, level, old)
+        elif level < old:
+            yield RosterEvent(EventKind.DEATH_SUSPECT, world, name, level, old)
+
+    for name, old in zip(previous.names, previous_levels):
+        if name not in current_index:
+            yield RosterEvent(EventKind.LOGOUT, world, name, old, old)
+
+
+class RosterDiffer:
+    """Streaming stage turning successive rosters per world into events.
+
+    The first roster seen for a world only sets the baseline. Subscribers are
+    called with ``(world, events)`` once per roster that produced events.
+    """
+
+    def __init__(self):
+        self._previous: dict[str, roster.OnlineRoster] = {}
+        self._subscribers: list[typing.Callable] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self, callback: typing.Callable[[str, list[RosterEvent]], typing.Any]
+    ) -> typing.Callable[[], None]:
+        """Call ``callback`` with new events; return a function undoing this.
+
+        Unsubscribing again is a no-op.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        subscribed = True
+
+        def unsubscribe() -> None:
+            nonlocal subscribed
+            with self._lock:
+                if subscribed:
+                    subscribed = False
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def feed(self, world: str, chars: roster.OnlineRoster) -> list[RosterEvent]:
+        with self._lock:
+            previous = self._previous.get(world)
+            self._previous[world] = chars
+        if previous is None:
+            return []
+
+        events = list(diff_rosters(previous, chars, world))
+        if events:
+            for callback in list(self._subscribers):
+                callback(world, events)
+        return events
+
+    def process(self, results: typing.Iterable) -> typing.Iterator[RosterEvent]:
+        """Feed :func:`crawler.crawl` results and yield the resulting events."""
+        for result in results:
+            if result.characters is not None:
+                yield from self.feed(result.world.name, result.characters)
@@ -0,0 +1,29 @@
+__all__ = (
+    "TibiaError",
+    "HTTPStatusError",
+    "CharacterNotFound",
+    "WorldNotFound",
+)
+
+
+class TibiaError(Exception):
+    """Base class for errors looking data up on tibia.com."""
+
+
+class HTTPStatusError(TibiaError):
+    def __init__(self, status_code: int, url: str):
+        super().__init__(f"HTTP {status_code} for {url}")
+        self.status_code = status_code
+        self.url = url
+
+
+class CharacterNotFound(TibiaError, LookupError):
+    def __init__(self, name: str | None = None):
+        super().__init__(f"Character {name!r} does not exist" if name else None)
+        self.name = name
+
+
+class WorldNotFound(TibiaError, LookupError):
+    def __init__(self, name: str | None = None):
+        super().__init__(f"World {name!r} does not exist" if name else None)
+        self.name = name
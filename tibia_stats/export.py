@@ -0,0 +1,224 @@
+"""Bulk export of the world list and every world's online roster.
+
+Columns follow the :class:`~tibia_stats.objects.World` and
+:class:`~tibia_stats.objects.Character` models. Enum fields become
+categorical (dictionary-encoded) columns, and levels become ``uint16``.
+Rosters are written one row group (Parquet), record batch (Arrow IPC) or
+block of rows (CSV) per world as each world arrives, so memory use stays
+bounded by the largest world. Parquet and Arrow IPC need ``pyarrow``; CSV
+only needs the standard library.
+"""
+
+__all__ = ("FORMATS", "Column", "world_columns", "character_columns", "export")
+
+import csv
+import datetime
+import enum
+import pathlib
+import types
+import typing
+
+import numpy as np
+
+from . import api, crawler, objects, roster
+
+# Output format and file extension.
+FORMATS = {"parquet": "parquet", "ipc": "arrow", "csv": "csv"}
+
+# Integer fields small enough for a narrower type than int32.
+_COMPACT = {"level": "uint16", "online_current": "uint16"}
+
+
+class Column(typing.NamedTuple):
+    name: str
+    # One of "string", "uint16", "int32", "timestamp", "list" or "category".
+    type: str
+    # Values of a "category" column; batches hold indexes into them (-1 for
+    # missing values).
+    categories: tuple[str, ...] = ()
+
+
+def _column(name: str, annotation: typing.Any) -> Column:
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        annotation = next(a for a in typing.get_args(annotation) if a is not type(None))
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return Column(name, "category", tuple(m.value for m in annotation))
+    if annotation is int:
+        return Column(name, _COMPACT.get(name, "int32"))
+    if annotation is datetime.datetime:
+        return Column(name, "timestamp")
+    if typing.get_origin(annotation) is list:
+        return Column(name, "list")
+    return Column(name, "string")
+
+
+def world_columns() -> list[Column]:
+    return [
+        _column(name, field.annotation)
+        for name, field in objects.World.model_fields.items()
+    ]
+
+
+def character_columns(worlds: typing.Sequence[str]) -> list[Column]:
+    """Columns of an online roster row; ``world`` is categorical over ``worlds``."""
+    fields = objects.Character.model_fields
+    return [
+        Column("world", "category", tuple(worlds)),
+        *(_column(name, fields[name].annotation) for name in ("name", "level")),
+        _column("vocation", fields["vocation"].annotation),
+    ]
+
+
+def _world_batch(worlds: list[objects.World], columns: list[Column]) -> dict:
+    batch = {}
+    for column in columns:
+        values = [getattr(world, column.name) for world in worlds]
+        if column.type == "category":
+            codes = {value: i for i, value in enumerate(column.categories)}
+            values = np.array([codes.get(v, -1) for v in values], dtype=np.int16)
+        batch[column.name] = values
+    return batch
+
+
+def _roster_batch(code: int, chars: roster.OnlineRoster) -> dict:
+    # Roster vocation codes already index roster.VOCATIONS, which is the
+    # order of the Vocation enum the column categories come from.
+    return {
+        "world": np.full(len(chars), code, dtype=np.int16),
+        "name": chars.names,
+        "level": chars.levels,
+        "vocation": chars.vocations,
+    }
+
+
+class _CsvWriter:
+    def __init__(self, path: pathlib.Path, columns: list[Column]):
+        self.columns = columns
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([c.name for c in columns])
+
+    def write(self, batch: dict) -> None:
+        columns = []
+        for column in self.columns:
+            values = batch[column.name]
+            if column.type == "category":
+                labels = np.array([*column.categories, ""], dtype=object)
+                values = labels[values].tolist()
+            elif column.type == "list":
+                values = ["|".join(v) if v else "" for v in values]
+            elif isinstance(values, np.ndarray):
+                values = values.tolist()
+            columns.append(values)
+        self.writer.writerows(zip(*columns))
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _ArrowWriter:
+    def __init__(self, path: pathlib.Path, columns: list[Column], fmt: str):
+        try:
+            import pyarrow as pa
+        except ImportError as exc:
+            raise ImportError(f"Exporting to {fmt} requires pyarrow") from exc
+
+        self.pa = pa
+        self.columns = columns
+        # Every batch must share the same dictionaries.
+        self.dictionaries = {
+            c.name: pa.array(c.categories, pa.string())
+            for c in columns
+            if c.type == "category"
+        }
+        self.schema = pa.schema(
+            [pa.field(c.name, self._type(c), nullable=True) for c in columns]
+        )
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self.writer = pa.ipc.new_file(path, self.schema)
+
+    def _type(self, column: Column):
+        pa = self.pa
+        if column.type == "category":
+            index = pa.int8() if len(column.categories) < 128 else pa.int16()
+            return pa.dictionary(index, pa.string())
+        return {
+            "string": pa.string(),
+            "uint16": pa.uint16(),
+            "int32": pa.int32(),
+            "timestamp": pa.timestamp("s"),
+            "list": pa.list_(pa.string()),
+        }[column.type]
+
+    def write(self, batch: dict) -> None:
+        pa = self.pa
+        arrays = []
+        for column, field in zip(self.columns, self.schema):
+            values = batch[column.name]
+            if column.type == "category":
+                codes = np.asarray(values)
+                indices = pa.array(
+                    codes.astype(field.type.index_type.to_pandas_dtype()),
+                    mask=codes < 0,
+                )
+                array = pa.DictionaryArray.from_arrays(
+                    indices, self.dictionaries[column.name]
+                )
+            else:
+                array = pa.array(values, field.type)
+            arrays.append(array)
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def _writer(path: pathlib.Path, columns: list[Column], fmt: str):
+    if fmt == "csv":
+        return _CsvWriter(path, columns)
+    return _ArrowWriter(path, columns, fmt)
+
+
+def export(
+    directory: str | pathlib.Path,
+    fmt: str = "parquet",
+    worlds: typing.Iterable[objects.World] | None = None,
+    max_workers: int = 16,
+    rate: float | None = None,
+) -> typing.Iterator[crawler.CrawlResult]:
+    """Write ``worlds.<ext>`` and ``characters.<ext>`` to ``directory``.
+
+    Both cover ``worlds``, every world by default. The world list is
+    written first. Rosters are then crawled with
+    :func:`~tibia_stats.crawler.crawl` and each world is appended as it
+    arrives; its :class:`~tibia_stats.crawler.CrawlResult` is yielded once
+    written, failed worlds included. Both files are complete once the
+    generator is exhausted or closed.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {list(FORMATS)}")
+    worlds = list(api.list_worlds() if worlds is None else worlds)
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    ext = FORMATS[fmt]
+
+    columns = world_columns()
+    out = _writer(directory / f"worlds.{ext}", columns, fmt)
+    try:
+        out.write(_world_batch(worlds, columns))
+    finally:
+        out.close()
+
+    codes = {world.name: i for i, world in enumerate(worlds)}
+    out = _writer(directory / f"characters.{ext}", character_columns(list(codes)), fmt)
+    try:
+        for result in crawler.crawl(worlds, max_workers=max_workers, rate=rate):
+            if result.error is None:
+                out.write(_roster_batch(codes[result.world.name], result.characters))
+            yield result
+    finally:
+        out.close()
@@ -0,0 +1,241 @@
+"""Live online counts and level histograms of watched worlds.
+
+A :class:`Broadcaster` fetches each watched world once per interval, no
+matter how many viewers or server processes there are, and publishes a
+compact :class:`Frame` to a shared ``diskcache`` store. A frame holds the
+online count, logins and logouts since the previous frame, and the level
+histogram per vocation in :data:`BIN_WIDTH`-level bins, with the bins that
+changed. Viewers read only the latest frame, which each process loads and
+indexes for percentiles once; nothing is fetched, parsed or rendered per
+viewer.
+"""
+
+__all__ = ("BIN_WIDTH", "Frame", "Broadcaster", "rebin")
+
+import os
+import threading
+import time
+import typing
+
+import numpy as np
+
+from . import api, diffing, metrics, ranking, roster, scheduler
+
+# Every level group offered by the app is a multiple of this.
+BIN_WIDTH = 5
+MAX_LEVEL = 3000
+
+
+def rebin(
+    histogram: np.ndarray, bin_width: int, by_vocation: bool = True
+) -> tuple[np.ndarray, np.ndarray]:
+    """Edges and counts of a :data:`BIN_WIDTH` histogram in wider bins.
+
+    Matches ``OnlineRoster.level_histogram(bin_width, MAX_LEVEL, by_vocation)``
+    of the roster the histogram was built from.
+    """
+    if bin_width % BIN_WIDTH:
+        raise ValueError(f"Bin width must be a multiple of {BIN_WIDTH}")
+    factor = bin_width // BIN_WIDTH
+    nbins = -(-histogram.shape[1] // factor)
+    padded = np.pad(histogram, ((0, 0), (0, nbins * factor - histogram.shape[1])))
+    counts = padded.reshape(len(histogram), nbins, factor).sum(axis=2, dtype=np.int64)
+    if not by_vocation:
+        counts = counts.sum(axis=0, keepdims=True)
+    return np.arange(nbins + 1, dtype=np.int64) * bin_width, counts
+
+
+class Frame(typing.NamedTuple):
+    seq: int
+    # Unix time the roster was fetched.
+    at: float
+    online: int
+    # Sorted levels, for percentiles.
+    levels: np.ndarray
+    # Characters per vocation code (rows) and BIN_WIDTH-level bin.
+    histogram: np.ndarray
+    # ``(vocation code, bin, previous count, count)`` rows, one per bin that
+    # changed since frame ``seq - 1``.
+    changes: np.ndarray
+    logins: tuple[str, ...]
+    logouts: tuple[str, ...]
+
+    def previous_histogram(self) -> np.ndarray:
+        """The histogram of frame ``seq - 1``."""
+        histogram = self.histogram.copy()
+        codes, bins, old, _ = self.changes.T
+        histogram[codes, bins] = old
+        return histogram
+
+
+def _histogram(chars: roster.OnlineRoster, nbins: int = 0) -> np.ndarray:
+    _, counts = chars.level_histogram(BIN_WIDTH, MAX_LEVEL)
+    return np.pad(counts, ((0, 0), (0, max(nbins - counts.shape[1], 0))))
+
+
+class Broadcaster:
+    """Polls watched worlds and publishes a :class:`Frame` per poll.
+
+    Viewers call :meth:`watch` to keep a world on the watch list for
+    ``lease`` seconds and :meth:`frame` to read its latest frame. Every
+    process using the store runs a poller thread, but a lock entry in the
+    store lets only one of them fetch a world per ``interval``. The fetches
+    run as scheduler crawl traffic with the interval as freshness target.
+    """
+
+    def __init__(self, store, interval: float = 30.0, lease: float | None = None):
+        self.store = store
+        self.interval = interval
+        self.lease = 3 * interval if lease is None else lease
+        self._renewed: dict[str, float] = {}
+        # Latest frame and its rank index per world, shared by viewers.
+        self._latest: dict[str, tuple[Frame, ranking.RankIndex]] = {}
+        self._lock = threading.Lock()
+        self._poller: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def _key(self, kind: str, world: str = "") -> tuple:
+        return ("live", kind, world.lower())
+
+    def watch(self, world: str) -> None:
+        """Keep ``world`` polled for another lease period."""
+        now = time.time()
+        # One store write per world and process every half interval is
+        # enough to keep the lease, however many viewers renew it.
+        if now - self._renewed.get(world, 0) >= self.interval / 2:
+            self._renewed[world] = now
+            with self.store.transact():
+                watched = self.store.get(self._key("watched"), {})
+                watched = {w: t for w, t in watched.items() if t > now}
+                watched[world] = now + self.lease
+                self.store.set(self._key("watched"), watched)
+        self._ensure_poller()
+
+    def watched(self) -> list[str]:
+        now = time.time()
+        watched = self.store.get(self._key("watched"), {})
+        return [world for world, expires in watched.items() if expires > now]
+
+    def frame(self, world: str) -> Frame | None:
+        return latest[0] if (latest := self.latest(world)) else None
+
+    def latest(self, world: str) -> tuple[Frame, ranking.RankIndex] | None:
+        """The latest frame of ``world`` and a rank index of its levels.
+
+        Both are built once per published frame and process; later calls
+        only read the frame's publication time from the store.
+        """
+        if (published := self.store.get(self._key("published", world))) is None:
+            return None
+        cached = self._latest.get(world.lower())
+        if cached is None or cached[0].at != published:
+            if (frame := self.store.get(self._key("frame", world))) is None:
+                return None
+            cached = frame, ranking.RankIndex(frame.levels)
+            self._latest[world.lower()] = cached
+        return cached
+
+    def latest_roster(
+        self, world: str, max_age: float | None = None
+    ) -> tuple[int, roster.OnlineRoster] | None:
+        """Sequence number and roster of the latest frame, if any.
+
+        Rosters fetched more than ``max_age`` seconds ago are ignored.
+        """
+        if (stored := self.store.get(self._key("roster", world))) is None:
+            return None
+        seq, at, names, levels, vocations = stored
+        if max_age is not None and time.time() - at > max_age:
+            return None
+        return seq, roster.OnlineRoster(names, levels, vocations)
+
+    def _ensure_poller(self) -> None:
+        with self._lock:
+            # Started on first use, i.e. after the server has forked workers.
+            if self._poller is None or not self._poller.is_alive():
+                self._stopped.clear()
+                self._poller = threading.Thread(target=self._run, daemon=True)
+                self._poller.start()
+
+    def close(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            for world in self.watched():
+                try:
+                    self.poll(world)
+                except Exception:
+                    # Try again once the lock expires.
+                    pass
+            self._stopped.wait(min(1.0, self.interval / 10))
+
+    def poll(self, world: str) -> Frame | None:
+        """Fetch ``world`` and publish a frame unless polled this interval."""
+        if not self.store.add(
+            self._key("poll", world), os.getpid(), expire=self.interval
+        ):
+            return None
+        admission = scheduler.get_scheduler()
+        admission.set_target(world, self.interval)
+        with scheduler.crawling():
+            chars = api.get_online_characters(world, refresh=True)
+        at = time.time()
+
+        with metrics.timed("live", "online", world):
+            previous = self.latest_roster(world)
+            frame = self.frame(world)
+            if previous is None or frame is None:
+                frame = Frame(
+                    0,
+                    at,
+                    len(chars),
+                    np.sort(chars.levels).astype(np.uint16),
+                    _histogram(chars).astype(np.uint16),
+                    np.empty((0, 4), dtype=np.int32),
+                    (),
+                    (),
+                )
+            else:
+                frame = self._next(frame, previous[1], chars, at, world)
+            with self.store.transact():
+                self.store.set(self._key("frame", world), frame)
+                self.store.set(self._key("published", world), frame.at)
+                self.store.set(
+                    self._key("roster", world),
+                    (frame.seq, at, chars.names, chars.levels, chars.vocations),
+                )
+        return frame
+
+    def _next(
+        self,
+        frame: Frame,
+        previous: roster.OnlineRoster,
+        chars: roster.OnlineRoster,
+        at: float,
+        world: str,
+    ) -> Frame:
+        old = frame.histogram
+        histogram = _histogram(chars, old.shape[1])
+        old = np.pad(old, ((0, 0), (0, histogram.shape[1] - old.shape[1])))
+        codes, bins = np.nonzero(old != histogram)
+        changes = np.column_stack(
+            (codes, bins, old[codes, bins], histogram[codes, bins])
+        ).astype(np.int32)
+
+        logins, logouts = [], []
+        for event in diffing.diff_rosters(previous, chars, world):
+            if event.kind == diffing.EventKind.LOGIN:
+                logins.append(event.name)
+            elif event.kind == diffing.EventKind.LOGOUT:
+                logouts.append(event.name)
+        return Frame(
+            frame.seq + 1,
+            at,
+            len(chars),
+            np.sort(chars.levels).astype(np.uint16),
+            histogram.astype(np.uint16),
+            changes,
+            tuple(logins),
+            tuple(logouts),
+        )
@@ -0,0 +1,217 @@
+__all__ = (
+    "Histogram",
+    "stage_seconds",
+    "timed",
+    "enable",
+    "publish",
+    "publish_periodically",
+    "published",
+    "render",
+    "render_samples",
+)
+
+import contextlib
+import os
+import threading
+import time
+import typing
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+enabled = os.getenv("TIBIA_STATS_METRICS", "1").lower() not in ("0", "false", "no")
+
+
+def enable(value: bool = True) -> None:
+    global enabled
+    enabled = value
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: typing.Sequence[str], values: typing.Sequence) -> str:
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return f"{{{pairs}}}" if pairs else ""
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram keyed by label values."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            if (series := self._series.get(labels)) is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, reset: bool = False) -> dict[tuple, tuple[list, float, int]]:
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+            if reset:
+                self._series.clear()
+        return series
+
+    def merge(self, snapshot: dict[tuple, tuple[list, float, int]]) -> None:
+        with self._lock:
+            for labels, (counts, total, count) in snapshot.items():
+                if (series := self._series.get(labels)) is None:
+                    series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for values, (counts, total, count) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _labels((*self.labels, "le"), (*values, bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels((*self.labels, "le"), (*values, "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+stage_seconds = Histogram(
+    "tibia_stats_stage_seconds",
+    "Time spent per lookup stage.",
+    labels=("stage", "resource", "world"),
+)
+
+
+class _Timer:
+    __slots__ = ("labels", "start")
+
+    def __init__(self, labels: tuple[str, str, str]):
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stage_seconds.observe(time.perf_counter() - self.start, *self.labels)
+
+
+_disabled = contextlib.nullcontext()
+
+
+def timed(stage: str, resource: str = "", world: str = ""):
+    """Context manager recording its duration in :data:`stage_seconds`."""
+    if not enabled:
+        return _disabled
+    return _Timer((stage, resource, world))
+
+
+def publish(store, key: str = "metrics") -> None:
+    """Move this process's observations into a shared diskcache ``store``.
+
+    Background jobs and server workers run in separate processes; publishing
+    lets a single ``/metrics`` scrape report all of them.
+    """
+    delta = stage_seconds.snapshot(reset=True)
+    if not delta:
+        return
+    with store.transact():
+        shared = store.get(key, {})
+        for labels, (counts, total, count) in delta.items():
+            if labels in shared:
+                old_counts, old_total, old_count = shared[labels]
+                counts = [a + b for a, b in zip(old_counts, counts)]
+                total += old_total
+                count += old_count
+            shared[labels] = (counts, total, count)
+        store.set(key, shared)
+
+
+_publisher: tuple[int, threading.Thread] | None = None
+_publisher_lock = threading.Lock()
+
+
+def _publish_loop(store, interval: float, key: str) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            publish(store, key)
+        except Exception:
+            # The store may be briefly locked; the next round publishes.
+            pass
+
+
+def publish_periodically(store, interval: float = 10.0, key: str = "metrics") -> None:
+    """Publish this process's observations every ``interval`` seconds.
+
+    Cheap enough to call on every request: a daemon thread does the store
+    writes, started once per process (so also in forked workers).
+    """
+    global _publisher
+    pid = os.getpid()
+    if _publisher is not None and _publisher[0] == pid:
+        return
+    with _publisher_lock:
+        if _publisher is None or _publisher[0] != pid:
+            thread = threading.Thread(
+                target=_publish_loop, args=(store, interval, key), daemon=True
+            )
+            thread.start()
+            _publisher = (pid, thread)
+
+
+def published(store, key: str = "metrics") -> Histogram:
+    """The stage histogram aggregated from everything published to ``store``."""
+    histogram = Histogram(
+        stage_seconds.name,
+        stage_seconds.documentation,
+        stage_seconds.labels,
+        stage_seconds.buckets,
+    )
+    histogram.merge(store.get(key, {}))
+    return histogram
+
+
+def render_samples(
+    name: str,
+    documentation: str,
+    kind: str,
+    label_names: typing.Sequence[str],
+    samples: typing.Mapping[tuple, float],
+) -> list[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for values, value in sorted(samples.items()):
+        lines.append(f"{name}{_labels(label_names, values)} {value}")
+    return lines
+
+
+def render(histogram: Histogram = stage_seconds, *extra: list[str]) -> str:
+    """Prometheus text exposition of ``histogram`` plus ``extra`` samples."""
+    lines = histogram.render()
+    for block in extra:
+        lines.extend(block)
+    return "\n".join(lines) + "\n"
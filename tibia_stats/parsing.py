@@ -0,0 +1,188 @@
+__all__ = (
+    "BACKENDS",
+    "get_backend",
+    "set_backend",
+    "world_info_rows",
+    "character_info_rows",
+    "online_rows",
+    "world_list_rows",
+    "fragment",
+)
+
+import os
+
+from . import utils
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+BACKENDS = ("bs4", "lxml")
+
+
+def _default_backend() -> str:
+    if backend := os.getenv("TIBIA_STATS_PARSER"):
+        return backend
+    return "bs4" if lxml is None else "lxml"
+
+
+_backend = _default_backend()
+
+
+def get_backend() -> str:
+    return _backend
+
+
+def set_backend(backend: str) -> str:
+    """Select the parsing backend and return the previous one.
+
+    ``bs4`` builds a full BeautifulSoup tree of the page and is always
+    available. ``lxml`` walks the C-backed lxml tree straight to the target
+    table and never materialises Python objects for the rest of the page.
+    """
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parsing backend {backend!r}")
+    if backend == "lxml" and lxml is None:
+        raise ValueError("The lxml parsing backend requires the lxml package")
+    previous, _backend = _backend, backend
+    return previous
+
+
+# Where the table each page parser reads starts and stops: the marker, the
+# occurrence of it to start at, and the marker that ends the fragment.
+_FRAGMENTS = {
+    "worlds": ('class="Table3"', 1, None),
+    "world": ('class="Table1"', 2, 'class="Table2"'),
+    "online": ('class="Table2"', 1, None),
+    "character": ('class="Table3"', 1, 'class="Table3"'),
+}
+
+
+def fragment(markup: str, page: str) -> str:
+    """The part of ``markup`` that the parser for ``page`` depends on.
+
+    Cheap string slicing, meant for change detection: two responses with
+    the same fragment parse to the same rows. Falls back to the whole
+    markup if the page does not look as expected.
+    """
+    marker, occurrence, until = _FRAGMENTS[page]
+    start = -1
+    for _ in range(occurrence):
+        start = markup.find(marker, start + 1)
+        if start < 0:
+            return markup
+    end = markup.find(until, start + 1) if until else -1
+    if end < 0:
+        end = markup.rfind("</table>")
+    return markup[start:end] if end > start else markup[start:]
+
+
+def _soup(markup: str):
+    # Imported here so the lxml backend never pays for loading bs4.
+    import bs4
+
+    return bs4.BeautifulSoup(markup, "html.parser")
+
+
+def _has_class(name: str) -> str:
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+def _lxml_table(markup: str, path: str):
+    """First element matching ``path``, or ``None`` if the page lacks it."""
+    matches = lxml.html.fromstring(markup).xpath(path)
+    return matches[0] if matches else None
+
+
+def _soup_table(soup, table_class: str, container_class: str):
+    if (outer := soup.find("table", class_=table_class)) is None:
+        return None
+    if (container := outer.find("div", class_=container_class)) is None:
+        return None
+    return container.find("table")
+
+
+def world_info_rows(markup: str) -> list[str]:
+    """Decoded ``Key:Value`` rows of the world information table."""
+    if _backend == "lxml":
+        table = _lxml_table(markup, f"((//table[{_has_class('Table1')}])[2]//table)[1]")
+        if table is None:
+            return []
+        return [utils.decode(r.text_content()) for r in table.iterfind(".//tr")]
+
+    soup = _soup(markup)
+    tables = soup.find_all("table", class_="Table1")
+    if len(tables) < 2 or (table := tables[1].find("table")) is None:
+        return []
+    return [utils.decode(r.text) for r in table.find_all("tr")]
+
+
+def character_info_rows(markup: str) -> list[str]:
+    """Decoded ``Key:Value`` rows of the character information table."""
+    if _backend == "lxml":
+        table = _lxml_table(
+            markup,
+            f"(((//table[{_has_class('Table3')}])[1]"
+            f"//div[{_has_class('TableContentContainer')}])[1]//table)[1]",
+        )
+        if table is None:
+            return []
+        return [utils.decode(r.text_content()) for r in table.iterfind(".//tr")]
+
+    soup = _soup(markup)
+    table = _soup_table(soup, "Table3", "TableContentContainer")
+    if table is None:
+        return []
+    return [utils.decode(r.text) for r in table.find_all("tr")]
+
+
+def online_rows(markup: str) -> list[list[str]]:
+    """Decoded cells of every row of a world's online characters table."""
+    if _backend == "lxml":
+        table = _lxml_table(
+            markup,
+            f"(((//table[{_has_class('Table2')}])[1]"
+            f"//div[{_has_class('InnerTableContainer')}])[1]//table)[1]",
+        )
+        if table is None:
+            return []
+        rows = table.findall(".//tr")[1:]
+        return [[utils.decode(c.text_content()) for c in row] for row in rows]
+
+    soup = _soup(markup)
+    table = _soup_table(soup, "Table2", "InnerTableContainer")
+    if table is None:
+        return []
+    rows = table.find_all("tr")[1:]
+    return [[utils.decode(c.text) for c in row.children] for row in rows]
+
+
+def world_list_rows(markup: str) -> list[tuple[list[str], str | None]]:
+    """Stripped cells of every world row and its BattlEye icon source."""
+    if _backend == "lxml":
+        table = _lxml_table(
+            markup,
+            f"((//table[{_has_class('Table3')}])[1]"
+            f"//table[{_has_class('TableContent')}])[3]",
+        )
+        result = []
+        for row in table.findall(".//tr")[1:]:
+            icon = row[4].find(".//image")
+            cells = [c.text_content().strip() for c in row]
+            result.append((cells, None if icon is None else icon.get("src")))
+        return result
+
+    soup = _soup(markup)
+    rows = list(
+        soup.find("table", class_="Table3").find_all("table", class_="TableContent")
+    )[2].find_all("tr")[1:]
+    result = []
+    for row in rows:
+        cells = list(row.children)
+        icon = cells[4].find("image")
+        result.append(
+            ([c.text.strip() for c in cells], None if icon is None else icon["src"])
+        )
+    return result
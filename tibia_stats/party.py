@@ -0,0 +1,204 @@
+__all__ = ("TEAM_HUNT", "PartyWindow", "PartyFinder")
+
+import typing
+
+import numpy as np
+
+from . import objects, roster, utils
+
+Requirement = objects.Vocation | tuple[objects.Vocation, ...]
+
+# One of each promoted vocation, the classic shared-XP team hunt.
+TEAM_HUNT: dict[Requirement, int] = {
+    objects.Vocation.EK: 1,
+    objects.Vocation.ED: 1,
+    objects.Vocation.MS: 1,
+    objects.Vocation.RP: 1,
+}
+
+
+class PartyWindow(typing.NamedTuple):
+    min_level: int
+    max_level: int
+    # Online characters in the window per requirement, in requirement order.
+    counts: tuple[int, ...]
+    # Disjoint parties that could be formed from them.
+    parties: int
+
+
+class PartyFinder:
+    """Shared-XP party windows of one world for a vocation requirement.
+
+    A window is anchored at the level of its lowest member ``lo`` and spans
+    every level that can share experience with it, up to
+    ``utils.max_sharer(lo)``. Levels are sorted once per requirement group.
+    As the anchor moves up both window edges only move up, so the edges of
+    all windows come from one vectorised ``searchsorted`` pass per group.
+    """
+
+    def __init__(
+        self,
+        online: roster.OnlineRoster,
+        requirements: typing.Mapping[Requirement, int] = TEAM_HUNT,
+    ):
+        self.online = online
+        self.requirements = dict(requirements)
+        self.needs = np.array(list(self.requirements.values()), dtype=np.int64)
+        if not len(self.needs) or (self.needs < 1).any():
+            raise ValueError("Every requirement needs at least one character")
+
+        self.groups: list[list[int]] = []
+        for requirement in self.requirements:
+            vocations = (requirement,) if isinstance(requirement, str) else requirement
+            group = {
+                roster.VOCATION_CODES[objects.Vocation(v).value] for v in vocations
+            }
+            if any(group.intersection(other) for other in self.groups):
+                raise ValueError("Requirements must not share vocations")
+            self.groups.append(sorted(group))
+
+        self._members, self._levels = [], []
+        for group in self.groups:
+            (members,) = np.nonzero(np.isin(online.vocations, group))
+            members = members[np.argsort(online.levels[members], kind="stable")]
+            self._members.append(members)
+            self._levels.append(online.levels[members].astype(np.int64))
+
+        # Every level a candidate has is a possible lowest level.
+        self.anchors = np.unique(np.concatenate(self._levels)).astype(np.int64)
+        bounds = utils.max_sharer(self.anchors)
+        starts = np.stack([np.searchsorted(lv, self.anchors) for lv in self._levels])
+        ends = np.stack(
+            [np.searchsorted(lv, bounds, side="right") for lv in self._levels]
+        )
+        self.counts = ends - starts
+        # Highest candidate level in each window; groups with nobody online
+        # contribute zeros.
+        highest = [
+            (
+                np.where(count > 0, lv[np.maximum(end - 1, 0)], 0)
+                if len(lv)
+                else np.zeros(len(self.anchors), dtype=np.int64)
+            )
+            for lv, count, end in zip(self._levels, self.counts, ends)
+        ]
+        self.tops = np.max(highest, axis=0) if len(self.anchors) else self.anchors
+        # A window with the same candidates at the top as the previous anchor
+        # holds a subset of that window's candidates.
+        total_ends = ends.sum(axis=0)
+        self._maximal = np.ones(len(self.anchors), dtype=bool)
+        self._maximal[1:] = total_ends[1:] != total_ends[:-1]
+
+    def parties(self, needs: np.ndarray | None = None) -> np.ndarray:
+        """Disjoint parties per window; requirements with no need are skipped."""
+        needs = self.needs if needs is None else needs
+        required = needs > 0
+        if not required.any():
+            return np.ones(len(self.anchors), dtype=np.int64)
+        per_group = self.counts[required] // needs[required][:, np.newaxis]
+        return per_group.min(axis=0)
+
+    def _window(self, i: int, parties: np.ndarray) -> PartyWindow:
+        return PartyWindow(
+            int(self.anchors[i]),
+            int(self.tops[i]),
+            tuple(int(c) for c in self.counts[:, i]),
+            int(parties[i]),
+        )
+
+    def windows(self, limit: int | None = 10) -> list[PartyWindow]:
+        """Windows that can form at least one party, best first.
+
+        Windows are ranked by the number of disjoint parties, then by the
+        number of candidates. Windows whose candidates all belong to a
+        window anchored lower are left out.
+        """
+        parties = self.parties()
+        (viable,) = np.nonzero(self._maximal & (parties > 0))
+        total = self.counts.sum(axis=0)[viable]
+        order = np.lexsort((-total, -parties[viable]))
+        return [self._window(i, parties) for i in viable[order][:limit].tolist()]
+
+    def candidates(self, window: PartyWindow) -> list[list[str]]:
+        """Names per requirement within ``window``, highest level first."""
+        names = []
+        for members, levels in zip(self._members, self._levels):
+            lo = np.searchsorted(levels, window.min_level, side="left")
+            hi = np.searchsorted(levels, window.max_level, side="right")
+            names.append([self.online.names[i] for i in members[lo:hi][::-1]])
+        return names
+
+    def best_windows(
+        self,
+        levels: typing.Iterable[int],
+        vocations: typing.Iterable[objects.Vocation] | None = None,
+    ) -> list[PartyWindow | None]:
+        """The best window to join for each target level, or ``None``.
+
+        A target at level ``L`` fits windows anchored between
+        ``utils.min_sharer(L)`` and ``L``. When the target's vocation is
+        given and required, the target takes one of those slots. Each
+        distinct slot costs one sparse-table build over the windows; every
+        target is then answered with two table lookups.
+        """
+        levels = np.asarray(list(levels), dtype=np.int64)
+        if vocations is None:
+            slots = np.full(len(levels), -1, dtype=np.int64)
+        else:
+            slots = np.array([self._slot(v) for v in vocations], dtype=np.int64)
+        result: list[PartyWindow | None] = [None] * len(levels)
+        if not len(self.anchors) or not len(levels):
+            return result
+
+        starts = np.searchsorted(self.anchors, utils.min_sharer(levels), "left")
+        stops = np.searchsorted(self.anchors, levels, "right")
+        for slot in np.unique(slots).tolist():
+            needs = self.needs.copy()
+            if slot >= 0:
+                needs[slot] -= 1
+            parties = self.parties(needs)
+            (targets,) = np.nonzero((slots == slot) & (stops > starts))
+            best = self._range_best(
+                self._scores(parties), starts[targets], stops[targets]
+            )
+            for target, i in zip(targets.tolist(), best.tolist()):
+                if parties[i] > 0:
+                    result[target] = self._window(i, parties)
+        return result
+
+    def _slot(self, vocation: objects.Vocation) -> int:
+        code = roster.VOCATION_CODES[objects.Vocation(vocation).value]
+        for slot, group in enumerate(self.groups):
+            if code in group:
+                return slot
+        return -1
+
+    def _scores(self, parties: np.ndarray) -> np.ndarray:
+        """Rank key per window: parties, then candidates, then lowest anchor.
+
+        The anchor index is packed into the low digits so that a range
+        maximum also tells which window won.
+        """
+        n = len(self.anchors)
+        total = self.counts.sum(axis=0)
+        key = parties * (len(self.online) + 1) + total
+        return key * n + (n - 1 - np.arange(n))
+
+    def _range_best(
+        self, scores: np.ndarray, starts: np.ndarray, stops: np.ndarray
+    ) -> np.ndarray:
+        """Index of the best-scoring window in each ``[start, stop)`` range."""
+        n = len(scores)
+        # table[k][i] is the maximum of scores[i : i + 2**k].
+        table = [scores]
+        while 2 ** len(table) <= n:
+            half = 2 ** (len(table) - 1)
+            table.append(np.maximum(table[-1][:-half], table[-1][half:]))
+
+        k = np.log2(stops - starts).astype(np.int64)
+        best = np.empty(len(starts), dtype=np.int64)
+        for level in np.unique(k).tolist():
+            sel = k == level
+            row = table[level]
+            best[sel] = np.maximum(row[starts[sel]], row[stops[sel] - 2**level])
+        return n - 1 - best % n
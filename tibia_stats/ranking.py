@@ -0,0 +1,58 @@
+__all__ = ("RankIndex",)
+
+import collections
+import typing
+
+import numpy as np
+
+
+class RankIndex:
+    """Sorted level array answering rank and percentile queries."""
+
+    def __init__(self, levels: typing.Iterable[int]):
+        if not isinstance(levels, np.ndarray):
+            levels = np.fromiter(levels, dtype=np.int64)
+        self.levels = np.sort(levels.astype(np.int64))
+
+    @classmethod
+    def from_characters(cls, chars: typing.Iterable) -> "RankIndex":
+        return cls(c.level for c in chars)
+
+    @classmethod
+    def by_vocation(cls, chars: typing.Iterable) -> dict[typing.Any, "RankIndex"]:
+        groups = collections.defaultdict(list)
+        for c in chars:
+            groups[c.vocation].append(c.level)
+        return {vocation: cls(levels) for vocation, levels in groups.items()}
+
+    @classmethod
+    def by_world(
+        cls, rosters: typing.Mapping[str, typing.Iterable]
+    ) -> dict[str, "RankIndex"]:
+        return {world: cls.from_characters(chars) for world, chars in rosters.items()}
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def ranks(self, levels: typing.Iterable[int]) -> np.ndarray:
+        """1-based rank of each level; ties share the best rank."""
+        levels = np.asarray(levels, dtype=np.int64)
+        return len(self.levels) - np.searchsorted(self.levels, levels, "right") + 1
+
+    def rank(self, level: int) -> int:
+        return int(self.ranks([level])[0])
+
+    def percentiles(self, levels: typing.Iterable[int]) -> np.ndarray:
+        """Fraction of characters at or above each level.
+
+        A level at or below the lowest online gets 1.0; the list scan this
+        replaced returned ``None`` there. An empty index gives NaN.
+        """
+        levels = np.asarray(levels, dtype=np.int64)
+        if not len(self.levels):
+            return np.full(levels.shape, np.nan)
+        above = len(self.levels) - np.searchsorted(self.levels, levels, "left")
+        return above / len(self.levels)
+
+    def percentile(self, level: int) -> float:
+        return float(self.percentiles([level])[0])
@@ -0,0 +1,421 @@
+"""Record tibia.com responses and replay them, or synthetic pages, locally.
+
+    client = Client()
+    replay.record(client, "recordings/")      # save every response
+    replay.replay(client, "recordings/", latency=0.2, error_rate=0.01)
+
+Or through the environment, for :func:`tibia_stats.client.get_client`:
+
+    TIBIA_STATS_RECORD=recordings/
+    TIBIA_STATS_REPLAY=recordings/        # or "synthetic"
+    TIBIA_STATS_REPLAY_LATENCY=0.2        # seconds, per request
+    TIBIA_STATS_REPLAY_ERRORS=0.01        # fraction answered with a 503
+    TIBIA_STATS_REPLAY_PLAYERS=1500       # online per synthetic world
+    TIBIA_STATS_REPLAY_ETAGS=1            # answer conditional requests
+
+Replayed URLs that were never recorded fall back to synthetic pages with
+the table layout :mod:`tibia_stats.parsing` expects. Synthetic world
+``WorldN`` has characters named ``"WorldN Player <i>"``, and their
+character pages agree with the online list.
+"""
+
+__all__ = (
+    "Recorder",
+    "ReplayAdapter",
+    "record",
+    "replay",
+    "configure_from_env",
+    "synthetic_rows",
+    "online_table",
+    "world_page",
+    "character_page",
+    "not_found_page",
+    "worlds_page",
+)
+
+import functools
+import hashlib
+import html
+import http
+import json
+import os
+import pathlib
+import random
+import threading
+import time
+import typing
+import urllib.parse
+import zlib
+
+import requests
+import requests.adapters
+import requests.structures
+
+from . import client
+
+VOCATIONS = [
+    "Master Sorcerer",
+    "Elite Knight",
+    "Royal Paladin",
+    "Elder Druid",
+    "Sorcerer",
+    "Knight",
+    "Paladin",
+    "Druid",
+    "None",
+]
+LOCATIONS = ["Europe", "South America", "North America", "Oceania"]
+PVP_TYPES = [
+    "Open PvP",
+    "Retro Open PvP",
+    "Optional PvP",
+    "Hardcore PvP",
+    "Retro Hardcore PvP",
+]
+
+
+def _nbsp(text: str) -> str:
+    return text.replace(" ", "&#160;")
+
+
+def _page(body: str) -> str:
+    return (
+        "<!DOCTYPE html><html><head><title>Tibia - Free Multiplayer Online Role "
+        'Playing Game - Community</title></head><body><div id="MenuColumn">'
+        '<table class="Table5"><tr><td>Menu</td></tr></table></div>'
+        '<div id="ContentColumn"><div class="Border_2"><div class="BoxContent">'
+        f"{body}</div></div></div>"
+        '<div id="Footer">Copyright by CipSoft GmbH. All rights reserved.</div>'
+        "</body></html>"
+    )
+
+
+def _container(table_class: str, inner_class: str, inner: str) -> str:
+    return (
+        f'<div class="TableContainer"><table class="{table_class}" '
+        'cellpadding="0" cellspacing="0"><div class="CaptionContainer">'
+        '<div class="Text">Caption</div></div><tr><td>'
+        f'<div class="{inner_class}"><table style="width:100%;">{inner}</table>'
+        "</div></td></tr></table></div>"
+    )
+
+
+def _world_selection() -> str:
+    return _container(
+        "Table1",
+        "InnerTableContainer",
+        '<tr><td class="LabelV">World:</td><td><form><select name="world">'
+        "<option>Antica</option><option>Secura</option></select></form></td></tr>",
+    )
+
+
+def _world_information(online: int) -> str:
+    rows = [
+        ("Status", "Online"),
+        ("Players Online", str(online)),
+        ("Online Record", "1,250 players (on Jul 04 2020, 03:34:30 CEST)"),
+        ("Creation Date", "Jan 1997"),
+        ("Location", "Europe"),
+        ("PvP Type", "Open PvP"),
+        ("World Quest Titles", "Rise of Devovorga, Bewitched, The Colours of Magic"),
+        ("BattlEye Status", "Protected by BattlEye since its release."),
+        ("Game World Type", "Regular"),
+    ]
+    inner = "".join(
+        f'<tr><td class="LabelV200">{key}:</td><td>{value}</td></tr>'
+        for key, value in rows
+    )
+    return _container("Table1", "InnerTableContainer", inner)
+
+
+def synthetic_rows(
+    players: int, seed: int = 0, prefix: str = ""
+) -> list[tuple[str, int, str]]:
+    """``(name, level, vocation)`` of a synthetic world, highest level first."""
+    rnd = random.Random(seed)
+    levels = sorted((rnd.randint(8, 2500) for _ in range(players)), reverse=True)
+    return [
+        (f"{prefix}Player {i}", level, rnd.choice(VOCATIONS))
+        for i, level in enumerate(levels)
+    ]
+
+
+def online_table(players: int, seed: int = 0, prefix: str = "") -> str:
+    rows = "".join(
+        f'<tr class="{"Odd" if i % 2 else "Even"}">'
+        '<td style="width:70%;text-align:left;">'
+        '<a href="https://www.tibia.com/community/?subtopic=characters&amp;'
+        f'name={urllib.parse.quote_plus(name)}">{_nbsp(name)}</a></td>'
+        f'<td style="width:10%;">{level}</td>'
+        f'<td style="width:20%;">{_nbsp(vocation)}</td></tr>'
+        for i, (name, level, vocation) in enumerate(
+            synthetic_rows(players, seed, prefix)
+        )
+    )
+    header = '<tr class="LabelH"><td>Name</td><td>Level</td><td>Vocation</td></tr>'
+    return _container("Table2", "InnerTableContainer", header + rows)
+
+
+def world_page(players: int, seed: int = 0, prefix: str = "") -> str:
+    """World page with ``players`` characters online."""
+    return _page(
+        _world_selection()
+        + _world_information(players)
+        + online_table(players, seed, prefix)
+    )
+
+
+def character_page(
+    name: str = "Player 1",
+    world: str = "Antica",
+    level: int = 512,
+    vocation: str = "Elite Knight",
+) -> str:
+    rows = [
+        ("Name", name),
+        ("Title", "Elite Hunter (12 titles unlocked)"),
+        ("Sex", "male"),
+        ("Vocation", vocation),
+        ("Level", str(level)),
+        ("Achievement Points", "321"),
+        ("World", world),
+        ("Residence", "Thais"),
+        ("Guild Membership", "Leader of the Example Guild"),
+        ("Last Login", "Oct 15 2026, 21:09:45 CEST"),
+        ("Account Status", "Premium Account"),
+    ]
+    inner = "".join(
+        f'<tr><td class="LabelV175">{key}:</td><td>{_nbsp(value)}</td></tr>'
+        for key, value in rows
+    )
+    information = (
+        '<div class="TableContainer"><table class="Table3" cellpadding="0" '
+        'cellspacing="0"><tr><td><div class="TableContentContainer">'
+        f'<table class="TableContent" width="100%">{inner}</table>'
+        "</div></td></tr></table></div>"
+    )
+    achievements = information.replace(inner, "<tr><td>No achievements.</td></tr>")
+    return _page(information + achievements)
+
+
+def not_found_page(name: str) -> str:
+    """Character search result for a name that does not exist."""
+    return _page(
+        _container(
+            "Table1",
+            "InnerTableContainer",
+            f"<tr><td><b>Character {html.escape(name)} does not exist.</b></td></tr>",
+        )
+    )
+
+
+def worlds_page(worlds: int = 90, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    icons = [
+        '<image src="https://static.tibia.com/images/global/content/'
+        'icon_battleyeinitial.gif">',
+        '<image src="https://static.tibia.com/images/global/content/icon_battleye.gif">',
+        "",
+    ]
+    rows = "".join(
+        f'<tr class="{"Odd" if i % 2 else "Even"}"><td><a href="#">World{i}</a></td>'
+        f"<td>{rnd.randint(0, 1500)}</td><td>{rnd.choice(LOCATIONS)}</td>"
+        f"<td>{rnd.choice(PVP_TYPES)}</td><td>{rnd.choice(icons)}</td>"
+        f'<td>{rnd.choice(["", "blocked", "experimental"])}</td></tr>'
+        for i in range(worlds)
+    )
+    header = (
+        '<tr class="LabelH"><td>World</td><td>Online</td><td>Location</td>'
+        "<td>PvP Type</td><td>BattlEye</td><td>Additional Information</td></tr>"
+    )
+    content = "".join(
+        f'<table class="TableContent" width="100%">{inner}</table>'
+        for inner in [
+            "<tr><td>Overall Maximum: 64,028 players</td></tr>",
+            "<tr><td>Filter</td></tr>",
+            header + rows,
+        ]
+    )
+    return _page(
+        '<div class="TableContainer"><table class="Table3" cellpadding="0" '
+        'cellspacing="0"><tr><td><div class="TableContentContainer">'
+        f"{content}</div></td></tr></table></div>"
+    )
+
+
+def _key(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    query = sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+    normalized = f"{parts.path}?{urllib.parse.urlencode(query)}".lower()
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+class Recorder:
+    """``requests`` response hook saving GET responses to ``directory``.
+
+    Only full 200 responses are saved: a 304 has no body to replay and
+    would overwrite the recording of the page it refers to.
+    """
+
+    def __init__(self, directory: str | os.PathLike):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, response: requests.Response, *args, **kw):
+        if response.request.method == "GET" and response.status_code == 200:
+            record = {
+                "url": response.url,
+                "status": response.status_code,
+                "content_type": response.headers.get("Content-Type", "text/html"),
+                "body": response.text,
+            }
+            path = self.directory / f"{_key(response.url)}.json"
+            path.write_text(json.dumps(record))
+        return response
+
+
+class ReplayAdapter(requests.adapters.BaseAdapter):
+    """Transport adapter answering from recordings or synthetic pages.
+
+    Every request sleeps ``latency`` plus up to ``jitter`` seconds. A
+    fraction ``error_rate`` of requests is answered with ``error_status``,
+    or raises :class:`requests.ConnectionError` when it is ``None``.
+    ``players`` is the online count of synthetic worlds, either one number
+    or a mapping from world name (worlds missing from it get 500). With
+    ``etags``, responses carry an ``ETag`` and matching conditional
+    requests are answered with 304 Not Modified.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int | None = 503,
+        players: int | typing.Mapping[str, int] = 500,
+        worlds: int = 90,
+        synthetic: bool = True,
+        etags: bool = False,
+        seed: int | None = None,
+    ):
+        super().__init__()
+        self.directory = None if directory is None else pathlib.Path(directory)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.players = players
+        self.worlds = worlds
+        self.synthetic = synthetic
+        self.etags = etags
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # Per adapter, so that dropping the adapter frees its pages.
+        self._world_page = functools.lru_cache(maxsize=16)(self._build_world_page)
+        self._world_rows = functools.lru_cache(maxsize=16)(self._build_world_rows)
+
+    def _players(self, world: str) -> int:
+        if isinstance(self.players, int):
+            return self.players
+        return self.players.get(world, 500)
+
+    def _build_world_page(self, world: str, players: int) -> str:
+        return world_page(players, zlib.crc32(world.encode()), prefix=f"{world} ")
+
+    def _build_world_rows(self, world: str, players: int) -> dict[str, tuple[int, str]]:
+        rows = synthetic_rows(players, zlib.crc32(world.encode()), f"{world} ")
+        return {name: (level, vocation) for name, level, vocation in rows}
+
+    def _synthetic(self, url: str) -> tuple[int, str]:
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+        if query.get("subtopic") == "worlds":
+            if world := query.get("world"):
+                return 200, self._world_page(world, self._players(world))
+            return 200, worlds_page(self.worlds)
+        if query.get("subtopic") == "characters" and (name := query.get("name")):
+            world = name.split(" Player ", 1)[0]
+            rows = self._world_rows(world, self._players(world))
+            if name not in rows:
+                return 200, not_found_page(name)
+            level, vocation = rows[name]
+            return 200, character_page(name, world, level, vocation)
+        return 404, _page("Not Found")
+
+    def _recorded(self, url: str) -> tuple[int, str] | None:
+        if self.directory is None:
+            return None
+        path = self.directory / f"{_key(url)}.json"
+        if not path.exists():
+            return None
+        record = json.loads(path.read_text())
+        return record["status"], record["body"]
+
+    def send(self, request: requests.PreparedRequest, **kw) -> requests.Response:
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed and self.error_status is None:
+            raise requests.ConnectionError("injected failure", request=request)
+
+        if failed:
+            status, body = self.error_status, _page("Service Unavailable")
+        elif (recorded := self._recorded(request.url)) is not None:
+            status, body = recorded
+        elif self.synthetic:
+            status, body = self._synthetic(request.url)
+        else:
+            status, body = 404, _page("Not Found")
+
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        content = body.encode()
+        if status == 200 and self.etags:
+            etag = f'"{hashlib.blake2b(content, digest_size=8).hexdigest()}"'
+            headers["ETag"] = etag
+            if request.headers.get("If-None-Match") == etag:
+                status, content = 304, b""
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = http.HTTPStatus(status).phrase
+        response.headers = requests.structures.CaseInsensitiveDict(headers)
+        response._content = content
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def record(http_client: client.Client, directory: str | os.PathLike) -> Recorder:
+    """Save every response ``http_client`` receives to ``directory``."""
+    recorder = Recorder(directory)
+    http_client.session.hooks["response"].append(recorder)
+    return recorder
+
+
+def replay(http_client: client.Client, directory=None, **kw) -> ReplayAdapter:
+    """Answer tibia.com requests of ``http_client`` with a :class:`ReplayAdapter`."""
+    adapter = ReplayAdapter(directory, **kw)
+    http_client.session.mount(client.BASE_URL, adapter)
+    return adapter
+
+
+def configure_from_env(http_client: client.Client) -> client.Client:
+    if directory := os.getenv("TIBIA_STATS_RECORD"):
+        record(http_client, directory)
+    if source := os.getenv("TIBIA_STATS_REPLAY"):
+        replay(
+            http_client,
+            None if source == "synthetic" else source,
+            latency=float(os.getenv("TIBIA_STATS_REPLAY_LATENCY", 0)),
+            error_rate=float(os.getenv("TIBIA_STATS_REPLAY_ERRORS", 0)),
+            players=int(os.getenv("TIBIA_STATS_REPLAY_PLAYERS", 500)),
+            etags=os.getenv("TIBIA_STATS_REPLAY_ETAGS", "").lower()
+            not in ("", "0", "false", "no"),
+        )
+    return http_client
@@ -0,0 +1,126 @@
+__all__ = ("OnlineRoster",)
+
+import functools
+import sys
+import typing
+
+import numpy as np
+
+from . import objects, ranking, sharing
+
+VOCATIONS = tuple(objects.Vocation)
+VOCATION_CODES = {vocation.value: code for code, vocation in enumerate(VOCATIONS)}
+
+
+class OnlineRoster:
+    """Column-oriented list of online characters.
+
+    Names are interned strings, levels an ``int32`` array and vocations a
+    ``uint8`` array of indexes into :data:`VOCATIONS`. Iterating or indexing
+    materialises :class:`objects.Character` models without re-validating the
+    columns.
+    """
+
+    def __init__(
+        self,
+        names: typing.Sequence[str],
+        levels: typing.Sequence[int] | np.ndarray,
+        vocations: typing.Sequence[int] | np.ndarray,
+    ):
+        self.names = list(names)
+        self.levels = np.asarray(levels, dtype=np.int32)
+        self.vocations = np.asarray(vocations, dtype=np.uint8)
+
+    @classmethod
+    def from_rows(cls, rows: typing.Iterable[typing.Sequence[str]]) -> "OnlineRoster":
+        names, levels, vocations = [], [], []
+        for name, level, vocation in rows:
+            names.append(sys.intern(name))
+            levels.append(int(level))
+            try:
+                vocations.append(VOCATION_CODES[vocation])
+            except KeyError:
+                raise ValueError(f"Unknown vocation {vocation!r}") from None
+        return cls(names, levels, vocations)
+
+    @classmethod
+    def from_characters(cls, chars: typing.Iterable) -> "OnlineRoster":
+        return cls.from_rows((c.name, c.level, c.vocation) for c in chars)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OnlineRoster":
+        return cls(
+            [sys.intern(name) for name in data["names"]],
+            data["levels"],
+            data["vocations"],
+        )
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable columns, e.g. for a ``dcc.Store``."""
+        return {
+            "names": self.names,
+            "levels": self.levels.tolist(),
+            "vocations": self.vocations.tolist(),
+        }
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, i: int) -> objects.Character:
+        (char,) = objects.Character.from_columns(
+            [self.names[i]], [int(self.levels[i])], [VOCATIONS[self.vocations[i]]]
+        )
+        return char
+
+    def __iter__(self) -> typing.Iterator[objects.Character]:
+        vocations = [VOCATIONS[code] for code in self.vocations.tolist()]
+        return iter(
+            objects.Character.from_columns(self.names, self.levels.tolist(), vocations)
+        )
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.name_index
+
+    @functools.cached_property
+    def name_index(self) -> dict[str, int]:
+        return {name: i for i, name in enumerate(self.names)}
+
+    @functools.cached_property
+    def sharers(self) -> sharing.SharerIndex:
+        return sharing.SharerIndex(self.levels)
+
+    @functools.cached_property
+    def ranks(self) -> ranking.RankIndex:
+        return ranking.RankIndex(self.levels)
+
+    def level_histogram(
+        self, bin_width: int, max_level: int = 0, by_vocation: bool = True
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Bin edges and counts, one row per vocation code or a single row."""
+        top = max(max_level, int(self.levels.max()) if len(self) else 0)
+        nbins = top // bin_width + 1
+        edges = np.arange(nbins + 1, dtype=np.int64) * bin_width
+        bins = self.levels // bin_width
+        if not by_vocation:
+            return edges, np.bincount(bins, minlength=nbins)[np.newaxis]
+        flat = self.vocations.astype(np.int64) * nbins + bins
+        counts = np.bincount(flat, minlength=len(VOCATIONS) * nbins)
+        return edges, counts.reshape(len(VOCATIONS), nbins)
+
+    def vocation_labels(self) -> np.ndarray:
+        return np.array([v.value for v in VOCATIONS], dtype=object)[self.vocations]
+
+    def to_frame(self):
+        """``pandas.DataFrame`` view with a categorical ``vocation`` column."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "name": self.names,
+                "level": self.levels,
+                "vocation": pd.Categorical.from_codes(
+                    self.vocations, categories=[v.value for v in VOCATIONS]
+                ),
+            },
+            copy=False,
+        )
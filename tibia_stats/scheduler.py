@@ -0,0 +1,250 @@
+"""Admission control for every request sent to tibia.com.
+
+Callers block in :meth:`Scheduler.admit` until the scheduler lets them send
+their request. Interactive lookups always go before crawl requests; crawl
+requests go earliest-due first, where a world is due once its online list
+is older than its freshness target. A token bucket caps the overall rate;
+after :func:`share` it is one bucket for every process using the same
+directory. The rate is halved whenever a request fails or tibia.com answers
+429 or 5xx, with a pause for any ``Retry-After``, and recovers gradually on
+successes.
+"""
+
+__all__ = (
+    "Priority",
+    "Scheduler",
+    "get_scheduler",
+    "set_scheduler",
+    "share",
+    "crawling",
+)
+
+import contextlib
+import contextvars
+import enum
+import heapq
+import itertools
+import os
+import threading
+import time
+import typing
+
+from . import client, metrics
+
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0
+    CRAWL = 1
+
+
+_priority = contextvars.ContextVar("priority", default=Priority.INTERACTIVE)
+
+
+@contextlib.contextmanager
+def crawling():
+    """Mark requests made in this context as background crawl traffic."""
+    token = _priority.set(Priority.CRAWL)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("event", "priority", "world")
+
+    def __init__(self, priority: Priority, world: str):
+        self.event = threading.Event()
+        self.priority = priority
+        self.world = world
+
+
+class Scheduler:
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 10,
+        min_rate: float = 0.5,
+        recovery: float = 0.05,
+        freshness: float = 60.0,
+    ):
+        self.max_rate = rate
+        self.min_rate = min_rate
+        # Fraction of ``max_rate`` regained per successful response.
+        self.recovery = recovery
+        self.freshness = freshness
+        self.targets: dict[str, float] = {}
+        self.limiter = client.RateLimiter(rate, burst)
+        self._polled: dict[str, float] = {}
+        self._queue: list[tuple] = []
+        self._order = itertools.count()
+        self._lock = threading.Condition()
+        self._dispatcher: threading.Thread | None = None
+        self._stats = {
+            f"{p.name.lower()}_{stat}": 0
+            for p in Priority
+            for stat in ("admitted", "wait_seconds", "max_wait_seconds")
+        }
+        self._stats["throttled"] = 0
+
+    @property
+    def rate(self) -> float:
+        return self.limiter.rate
+
+    def set_rate(self, rate: float) -> None:
+        """Change the target rate; the current rate is reset to it."""
+        self.max_rate = self.limiter.rate = rate
+
+    @contextlib.contextmanager
+    def limit(self, rate: float):
+        """Use ``rate`` within the context, then restore the previous rate."""
+        previous = self.max_rate, self.limiter.rate
+        self.set_rate(rate)
+        try:
+            yield
+        finally:
+            self.max_rate, self.limiter.rate = previous
+
+    def set_target(self, world: str, seconds: float) -> None:
+        """Aim to keep ``world``'s online list at most ``seconds`` old."""
+        self.targets[world.lower()] = seconds
+
+    def polled(self, world: str) -> None:
+        self._polled[world.lower()] = time.monotonic()
+
+    def due_at(self, world: str) -> float:
+        """When ``world`` should next be polled (monotonic clock)."""
+        key = world.lower()
+        if (last := self._polled.get(key)) is None:
+            return float("-inf")
+        return last + self.targets.get(key, self.freshness)
+
+    def due(self, worlds: typing.Iterable[str]) -> list[str]:
+        """``worlds`` ordered most overdue first; never polled ones lead."""
+        return sorted(worlds, key=self.due_at)
+
+    def admit(self, world: str = "") -> float:
+        """Block until a request for ``world`` may be sent; return the wait."""
+        priority = _priority.get()
+        now = time.monotonic()
+        waiter = None
+        with self._lock:
+            # Nobody is ahead of us: skip the hand-off to the dispatcher.
+            if self._queue or not self.limiter.try_acquire():
+                waiter = _Waiter(priority, world)
+                # Interactive requests are served in arrival order, crawl
+                # requests in order of their world's due time.
+                deadline = now
+                if priority == Priority.CRAWL and world:
+                    deadline = self.due_at(world)
+                heapq.heappush(
+                    self._queue, (priority, deadline, next(self._order), waiter)
+                )
+                self._ensure_dispatcher()
+                self._lock.notify()
+        waited = 0.0
+        if waiter is not None:
+            waiter.event.wait()
+            waited = time.monotonic() - now
+
+        name = priority.name.lower()
+        if metrics.enabled:
+            metrics.stage_seconds.observe(waited, "queue", name, world)
+        with self._lock:
+            self._stats[f"{name}_admitted"] += 1
+            if waited:
+                self._stats[f"{name}_wait_seconds"] += waited
+                if waited > self._stats[f"{name}_max_wait_seconds"]:
+                    self._stats[f"{name}_max_wait_seconds"] = waited
+        return waited
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._lock.wait()
+            # Waits out any backoff too, which drains the bucket.
+            self.limiter.acquire()
+            # Take the token before choosing who gets it, so that a request
+            # queued meanwhile with a higher priority is served first.
+            with self._lock:
+                *_, waiter = heapq.heappop(self._queue)
+            waiter.event.set()
+
+    def feedback(self, response) -> None:
+        """Adapt the rate to a response from tibia.com."""
+        status = response.status_code
+        if status == 429 or status >= 500:
+            retry_after = getattr(response, "headers", {}).get("Retry-After", "")
+            self._throttle(float(retry_after) if retry_after.isdigit() else 0.0)
+            return
+        with self._lock:
+            if self.limiter.rate < self.max_rate:
+                self.limiter.rate = min(
+                    self.max_rate, self.limiter.rate + self.max_rate * self.recovery
+                )
+
+    def failed(self) -> None:
+        """Back off after a request that got no response, e.g. a timeout."""
+        self._throttle(0.0)
+
+    def _throttle(self, retry_after: float) -> None:
+        with self._lock:
+            self._stats["throttled"] += 1
+            self.limiter.rate = max(self.min_rate, self.limiter.rate / 2)
+            self.limiter.drain(max(1 / self.limiter.rate, retry_after))
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            depth = {p: 0 for p in Priority}
+            for priority, *_ in self._queue:
+                depth[priority] += 1
+            stats = dict(self._stats)
+        stats.update({f"{p.name.lower()}_queued": n for p, n in depth.items()})
+        stats["rate"] = self.rate
+        now = time.monotonic()
+        stats["overdue_worlds"] = sum(
+            1 for world in self._polled if self.due_at(world) < now
+        )
+        return stats
+
+
+_scheduler: Scheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler(
+                    rate=float(os.getenv("TIBIA_STATS_RATE", 10)),
+                    freshness=float(os.getenv("TIBIA_STATS_FRESHNESS", 60)),
+                )
+    return _scheduler
+
+
+def set_scheduler(scheduler: Scheduler) -> Scheduler | None:
+    """Install ``scheduler`` for all api calls and return the previous one."""
+    global _scheduler
+    previous, _scheduler = _scheduler, scheduler
+    return previous
+
+
+def share(directory: str | os.PathLike) -> None:
+    """Draw every process's requests from one token bucket in ``directory``.
+
+    Call it before forking; processes sharing the directory then share the
+    scheduler's rate, backoff included. Priorities still apply only among
+    the requests of one process.
+    """
+    admission = get_scheduler()
+    admission.limiter = client.SharedRateLimiter(
+        directory, admission.max_rate, admission.limiter.burst
+    )
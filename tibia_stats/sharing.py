@@ -0,0 +1,48 @@
+__all__ = ("SharerIndex",)
+
+import typing
+
+import numpy as np
+
+from . import utils
+
+
+class SharerIndex:
+    """Sorted level array answering shared-XP queries by binary search."""
+
+    def __init__(self, levels: typing.Iterable[int]):
+        if not isinstance(levels, np.ndarray):
+            levels = np.fromiter(levels, dtype=np.int64)
+        self.levels = np.sort(levels.astype(np.int64))
+
+    @classmethod
+    def from_characters(cls, chars: typing.Iterable) -> "SharerIndex":
+        return cls(c.level for c in chars)
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def count(self, level: int) -> int:
+        lo = np.searchsorted(self.levels, utils.min_sharer(level), side="left")
+        hi = np.searchsorted(self.levels, utils.max_sharer(level), side="right")
+        return int(hi - lo)
+
+    def counts(self, levels: typing.Iterable[int]) -> np.ndarray:
+        levels = np.asarray(levels, dtype=np.int64)
+        lo = np.searchsorted(self.levels, utils.min_sharer(levels), side="left")
+        hi = np.searchsorted(self.levels, utils.max_sharer(levels), side="right")
+        return hi - lo
+
+    def curve(self) -> tuple[np.ndarray, np.ndarray]:
+        """Sharers for every level from the lowest to the highest online."""
+        if not len(self.levels):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        levels = np.arange(self.levels[0], self.levels[-1], dtype=np.int64)
+        return levels, self.counts(levels)
+
+    def top(self) -> tuple[int, int]:
+        levels, counts = self.curve()
+        if not len(levels):
+            return 0, 0
+        best = int(np.argmax(counts))
+        return int(levels[best]), int(counts[best])
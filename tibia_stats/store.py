@@ -0,0 +1,335 @@
+__all__ = ("SnapshotStore",)
+
+import contextlib
+import datetime
+import fcntl
+import os
+import pathlib
+import threading
+import typing
+
+import numpy as np
+
+from . import objects, roster
+
+# One append-only file per column in every day segment. A snapshot is
+# committed once its end offset is in ``offsets``; rows past the last
+# committed offset (e.g. after a crash) are ignored by readers.
+COLUMNS = {
+    "ids": np.int32,
+    "levels": np.uint16,
+    "vocations": np.uint8,
+    "times": np.int64,
+    "offsets": np.int64,
+}
+
+
+def _timestamp(at: datetime.datetime | None) -> int:
+    if at is None:
+        at = datetime.datetime.now(datetime.UTC)
+    return int(at.timestamp())
+
+
+def _day(timestamp: int) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.UTC).strftime("%Y-%m-%d")
+
+
+def _column(path: pathlib.Path, dtype) -> np.ndarray:
+    itemsize = np.dtype(dtype).itemsize
+    try:
+        count = path.stat().st_size // itemsize
+    except FileNotFoundError:
+        count = 0
+    if not count:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+class _Segment:
+    """Memory-mapped view of one world-day of snapshots."""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.times = _column(path / "times", np.int64)
+        self.offsets = _column(path / "offsets", np.int64)[: len(self.times)]
+        self.times = self.times[: len(self.offsets)]
+
+    def rows(self, column: str) -> np.ndarray:
+        end = int(self.offsets[-1]) if len(self.offsets) else 0
+        return _column(self.path / column, COLUMNS[column])[:end]
+
+    def starts(self) -> np.ndarray:
+        return np.concatenate(([0], self.offsets[:-1]))
+
+    def levels(self, positions: np.ndarray) -> np.ndarray:
+        """Decode the levels stored at ``positions``."""
+        running = np.cumsum(self.rows("levels"), dtype=np.int64)
+        snapshot = np.searchsorted(self.offsets, positions, side="right")
+        start = self.starts()[snapshot]
+        before = np.where(start > 0, running[np.maximum(start - 1, 0)], 0)
+        return running[positions] - before
+
+
+class SnapshotStore:
+    """Append-only on-disk store of timestamped online rosters.
+
+    Every world gets a directory holding a dictionary of character names
+    (``names``, one per line; the line number is the id) and one segment
+    directory per UTC day. Segments keep rows as int32 name ids, uint8
+    vocation codes and uint16 levels delta-encoded within each snapshot
+    (rows are sorted by level), plus per-snapshot timestamps and row offsets.
+    Queries memory-map only the segments in the requested time range.
+
+    Appends to a world hold a lock file in its directory, so several
+    processes can append to the same store. Snapshots of a world must be
+    appended in time order.
+    """
+
+    def __init__(self, root: str | os.PathLike):
+        self.root = pathlib.Path(root)
+        self._names: dict[str, dict[str, int]] = {}
+        # Bytes of each names file read into ``_names`` so far.
+        self._names_read: dict[str, int] = {}
+        self._names_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def worlds(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def _world_dir(self, world: str) -> pathlib.Path:
+        return self.root / world
+
+    def _name_ids(self, world: str, reload: bool = False) -> dict[str, int]:
+        """Ids of ``world``'s names; ``reload`` reads names added since."""
+        ids = self._names.get(world)
+        if ids is not None and not reload:
+            return ids
+        with self._names_lock:
+            ids = self._names.setdefault(world, {})
+            path = self._world_dir(world) / "names"
+            if path.exists():
+                with open(path, "rb") as f:
+                    f.seek(self._names_read.get(world, 0))
+                    data = f.read()
+                # Leave a line that is still being written for the next read.
+                data = data[: data.rfind(b"\n") + 1]
+                self._names_read[world] = self._names_read.get(world, 0) + len(data)
+                # Names are unique, so the line number is len(ids).
+                for name in data.decode("utf-8").splitlines():
+                    ids[name] = len(ids)
+        return ids
+
+    @contextlib.contextmanager
+    def _locked(self, world_dir: pathlib.Path):
+        """Hold ``world_dir``'s lock file against other threads and processes."""
+        with self._lock, open(world_dir / ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _last_time(world_dir: pathlib.Path) -> int | None:
+        days = sorted(p for p in world_dir.iterdir() if p.is_dir())
+        for path in reversed(days):
+            if len(times := _Segment(path).times):
+                return int(times[-1])
+        return None
+
+    def _names_list(self, world: str, ids: np.ndarray) -> list[str]:
+        names = self._name_ids(world)
+        if len(ids) and int(ids.max()) >= len(names):
+            # Written by another process since we last read the dictionary.
+            names = self._name_ids(world, reload=True)
+        return list(names)
+
+    def _segments(
+        self, world: str, since: int | None, until: int | None
+    ) -> typing.Iterator[_Segment]:
+        world_dir = self._world_dir(world)
+        if not world_dir.exists():
+            return
+        first = _day(since) if since is not None else ""
+        last = _day(until) if until is not None else "9999"
+        for path in sorted(p for p in world_dir.iterdir() if p.is_dir()):
+            if first <= path.name <= last:
+                yield _Segment(path)
+
+    def append(
+        self,
+        world: objects.World | str,
+        chars: roster.OnlineRoster,
+        at: datetime.datetime | None = None,
+    ) -> None:
+        """Store ``chars`` as ``world``'s snapshot at ``at`` (default: now).
+
+        Raises :class:`ValueError` if ``at`` is earlier than the world's
+        latest snapshot, since queries rely on snapshots being in time order.
+        """
+        name = world if isinstance(world, str) else world.name
+        world_dir = self._world_dir(name)
+
+        world_dir.mkdir(parents=True, exist_ok=True)
+        with self._locked(world_dir):
+            # Taken under the lock, so concurrent appends of "now" stay ordered.
+            timestamp = _timestamp(at)
+            if (last := self._last_time(world_dir)) is not None and timestamp < last:
+                raise ValueError(
+                    f"Snapshot of {name} at {timestamp} is older than the latest "
+                    f"one at {last}"
+                )
+            if not isinstance(world, str):
+                (world_dir / "world.json").write_text(world.model_dump_json())
+
+            # Another process may have added names since we last read them.
+            ids = self._name_ids(name, reload=True)
+            new_names = [n for n in dict.fromkeys(chars.names) if n not in ids]
+            if new_names:
+                with open(world_dir / "names", "a", encoding="utf-8") as f:
+                    f.writelines(f"{n}\n" for n in new_names)
+                ids = self._name_ids(name, reload=True)
+
+            order = np.argsort(chars.levels, kind="stable")
+            levels = chars.levels[order]
+            columns = {
+                "ids": np.fromiter(
+                    (ids[chars.names[i]] for i in order), np.int32, len(order)
+                ),
+                "levels": np.diff(levels, prepend=0).astype(np.uint16),
+                "vocations": chars.vocations[order],
+            }
+
+            segment = world_dir / _day(timestamp)
+            segment.mkdir(exist_ok=True)
+            end = self._truncate_uncommitted(segment) + len(order)
+            for column, values in columns.items():
+                with open(segment / column, "ab") as f:
+                    f.write(values.astype(COLUMNS[column]).tobytes())
+            with open(segment / "times", "ab") as f:
+                f.write(np.int64(timestamp).tobytes())
+            with open(segment / "offsets", "ab") as f:
+                f.write(np.int64(end).tobytes())
+
+    @staticmethod
+    def _truncate_uncommitted(path: pathlib.Path) -> int:
+        """Drop rows left behind by an interrupted append; return row count."""
+        segment = _Segment(path)
+        committed = {
+            "times": len(segment.offsets),
+            "offsets": len(segment.offsets),
+        }
+        rows = int(segment.offsets[-1]) if len(segment.offsets) else 0
+        for column, dtype in COLUMNS.items():
+            column_path = path / column
+            size = committed.get(column, rows) * np.dtype(dtype).itemsize
+            if column_path.exists() and column_path.stat().st_size > size:
+                os.truncate(column_path, size)
+        return rows
+
+    def world_info(self, world: str) -> objects.World | None:
+        path = self._world_dir(world) / "world.json"
+        if not path.exists():
+            return None
+        return objects.World.model_validate_json(path.read_text(), by_name=True)
+
+    def load(self, world: str, at: datetime.datetime | None = None):
+        """Latest snapshot of ``world`` taken at or before ``at``."""
+        until = _timestamp(at)
+        for segment in reversed(list(self._segments(world, None, until))):
+            index = int(np.searchsorted(segment.times, until, side="right")) - 1
+            if index < 0:
+                continue
+            start, end = segment.starts()[index], segment.offsets[index]
+            positions = np.arange(start, end)
+            ids = segment.rows("ids")[start:end]
+            names = self._names_list(world, ids)
+            chars = roster.OnlineRoster(
+                [names[i] for i in ids],
+                segment.levels(positions),
+                segment.rows("vocations")[start:end],
+            )
+            taken_at = datetime.datetime.fromtimestamp(
+                int(segment.times[index]), datetime.UTC
+            )
+            return taken_at, chars
+        return None
+
+    def character_levels(
+        self,
+        name: str,
+        world: str | None = None,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Timestamps (``datetime64[s]``) and levels of every sighting."""
+        since_ts = None if since is None else _timestamp(since)
+        until_ts = None if until is None else _timestamp(until)
+        times, levels = [], []
+        for world_name in [world] if world else self.worlds():
+            char_id = self._name_ids(world_name).get(name)
+            if char_id is None:
+                char_id = self._name_ids(world_name, reload=True).get(name)
+            if char_id is None:
+                continue
+            for segment in self._segments(world_name, since_ts, until_ts):
+                positions = np.flatnonzero(segment.rows("ids") == char_id)
+                if not len(positions):
+                    continue
+                snapshot = np.searchsorted(segment.offsets, positions, side="right")
+                taken = segment.times[snapshot]
+                keep = np.ones(len(taken), dtype=bool)
+                if since_ts is not None:
+                    keep &= taken >= since_ts
+                if until_ts is not None:
+                    keep &= taken <= until_ts
+                times.append(taken[keep])
+                levels.append(segment.levels(positions[keep]))
+
+        if not times:
+            return np.empty(0, dtype="datetime64[s]"), np.empty(0, dtype=np.int64)
+        times, levels = np.concatenate(times), np.concatenate(levels)
+        order = np.argsort(times, kind="stable")
+        return times[order].astype("datetime64[s]"), levels[order]
+
+    def online_counts(
+        self,
+        world: str,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+        interval: int = 60 * 60,
+        how: str = "mean",
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Online count of ``world`` aggregated per ``interval`` seconds."""
+        since_ts = None if since is None else _timestamp(since)
+        until_ts = None if until is None else _timestamp(until)
+        times, counts = [], []
+        for segment in self._segments(world, since_ts, until_ts):
+            times.append(np.asarray(segment.times))
+            counts.append(np.diff(segment.offsets, prepend=0))
+        if not times:
+            return np.empty(0, dtype="datetime64[s]"), np.empty(0)
+
+        times, counts = np.concatenate(times), np.concatenate(counts)
+        keep = np.ones(len(times), dtype=bool)
+        if since_ts is not None:
+            keep &= times >= since_ts
+        if until_ts is not None:
+            keep &= times <= until_ts
+        times, counts = times[keep], counts[keep]
+        if not len(times):
+            return np.empty(0, dtype="datetime64[s]"), np.empty(0)
+
+        buckets = times // interval * interval
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        if how == "max":
+            values = np.maximum.reduceat(counts, starts)
+        elif how == "mean":
+            values = np.add.reduceat(counts, starts) / np.diff(
+                np.append(starts, len(counts))
+            )
+        else:
+            raise ValueError(f"Unknown aggregation {how!r}")
+        return buckets[starts].astype("datetime64[s]"), values
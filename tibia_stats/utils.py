@@ -9,11 +9,11 @@ import datetime
 
 
 def min_sharer(level: int) -> int:
-    return int(level * 2 / 3)
+    return level * 2 // 3
 
 
 def max_sharer(level: int) -> int:
-    return int(level * 3 / 2) + 1
+    return level * 3 // 2 + 1
 
 
 def parse_tibian_date(date: str) -> datetime.datetime: